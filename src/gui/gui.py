@@ -12,7 +12,7 @@ from datetime import datetime, timedelta
 import pandas as pd
 import json
 
-from sim.data.data_manager import data_manager
+from sim.data.data_manager import DataManager
 from sim.simulation_manager import SimulationManager
 
 from gui_components import *
@@ -282,8 +282,9 @@ if st.session_state.new_simulation:
                     calendar_placeholder.empty()
 
                 if confirm_button:
-                    if data_manager.start_data_collection(selected_date):
-                        confirm_collection_modal(selected_date)
+                    # Collect the date now, the simulation models read it from the datafiles afterwards
+                    DataManager(date=selected_date)
+                    confirm_collection_modal(selected_date)
 
         #Check if all the needed data was introduced
         if (st.session_state.selected_date != None) or st.session_state.data_inserted:
@@ -63,7 +63,7 @@ def confirm_collection_modal(date_str):
 @st.dialog("Simulation Overview",width='large')
 def display_simulation_overview(json_data):
     rows = []
-    for agent_type in ['smart', 'basic']:
+    for agent_type in ['smart', 'basic', 'oracle']:
         agent_data = json_data.get(agent_type, {})
         
         for timestamp, details in agent_data.items():
@@ -109,6 +109,14 @@ def display_simulation_overview(json_data):
     "Battery_Basic",
     "Battery_Smart",]
 
+    # Perfect foresight upper bound, in results that have it
+    if "oracle" in json_data:
+        oracle_data = df_simulation[df_simulation["Agent_Type"] == "oracle"][["Time", "Battery", "Balance"]].rename(
+            columns={"Battery": "Battery_Oracle", "Balance": "Balance_Oracle"}
+        )
+        df_simulation = df_simulation.merge(oracle_data, on="Time", how="left")
+        all_columns += ["Balance_Oracle", "Battery_Oracle"]
+
     st.caption("Agent Simulation Overview")
 
     scale = st.selectbox( "Choose a scale for the polts.",
@@ -453,6 +461,12 @@ def render_results(json_data):
             ]
         }
 
+        if "oracle_agent_balance" in final_results:
+            comparison_data["Oracle (Upper Bound)"] = [
+                f"{final_results['oracle_agent_balance']:.2f}",
+                f"{final_results.get('oracle_agent_consumption_saving', 0.0):.2f}"
+            ]
+
         df = pd.DataFrame(comparison_data)
 
         # 3. Display Header and Table
@@ -473,6 +487,18 @@ def render_results(json_data):
             """
         )
 
+        if "smart_agent_oracle_gap" in final_results:
+            st.metric(
+                label="Gap to Oracle (Oracle - Smart)",
+                value=f"{final_results['smart_agent_oracle_gap']:.2f} €",
+                delta_color="inverse",
+                help=f"""
+                **Value:** `{final_results['smart_agent_oracle_gap']:.2f}`
+                - **What it is:** How far the Smart Agent is from the best possible schedule for this day.
+                - The Oracle knows the whole day's prices, production and consumption in advance, no real agent can beat it.
+                """
+            )
+
         # 4. Impact Highlight
         st.metric(
             label="Total Consumption Cost", 
@@ -495,6 +521,7 @@ def render_results(json_data):
             **What it is:** The net profit or loss generated by the agent during the simulation.
             - **Smart Agent Balance:** Total revenue from selling to the grid minus costs of buying from the grid and battery usage.
             - **Basic Agent Balance:** The benchmark performance, usually representing a standard 'dumb' strategy (e.g., just covering consumption).
+            - **Oracle Balance:** The best balance possible for the day, planned with perfect knowledge of prices, production and consumption.
             """)
 
         with st.expander("Consumption Saving"):
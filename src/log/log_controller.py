@@ -9,13 +9,17 @@ class LogController:
         "action_validation": "\033[94m",
         "smart_input": "\033[92m",
         "simulation": "\033[93m",
+        "oracle_input": "\033[95m",
+        "mpc_input": "\033[96m",
     }
 
     type_mapping = {
         "baseline_input": "BASELINE INPUT",
         "action_validation": "ACTION VALIDATION",
         "smart_input": "SMART INPUT",
-        "simulation": "SIMULATION"
+        "simulation": "SIMULATION",
+        "oracle_input": "ORACLE INPUT",
+        "mpc_input": "MPC INPUT"
     }
 
     reset = "\033[0m"  
@@ -28,6 +32,8 @@ class LogController:
         self.action_validation = os.getenv("ACTION_VALIDATION", "FALSE") == "TRUE"
         self.smart_input = os.getenv("SMART_INPUT", "FALSE") == "TRUE"
         self.simulation = os.getenv("SIMULATION", "FALSE") == "TRUE"
+        self.oracle_input = os.getenv("ORACLE_INPUT", "FALSE") == "TRUE"
+        self.mpc_input = os.getenv("MPC_INPUT", "FALSE") == "TRUE"
 
         current_date = datetime.now().strftime("%Y-%m-%d")
         log_folder = os.path.join(os.path.dirname(__file__), "files")
@@ -51,6 +57,10 @@ class LogController:
                 pass
             elif self.simulation:
                 pass
+            elif self.oracle_input:
+                pass
+            elif self.mpc_input:
+                pass
             else:
                 return
             self.add_log(message, type)
@@ -1,6 +1,6 @@
 import os
 from dotenv import load_dotenv
-from sim.data.json_result_manager import json_result_manager
+from sim.data.json_result_manager import JsonResultManager
 from sim.agent.smart.train import train_sac_agent, train_single_season
 
 load_dotenv()
@@ -9,26 +9,28 @@ mode = os.getenv("MODE")
 
 if __name__ == "__main__":
     if mode == "run_model":
-        from sim.model.model import HEMSModel
+        # ENGINE=fast runs the Mesa-free engine instead of HEMSModel
+        from sim.model.fast_engine import create_model, run_model
 
         """Run Smart Agent"""
-        model = HEMSModel(agent_type="smart")
+        model = create_model(agent_type="smart")
+        json_result_manager = JsonResultManager(data_manager=model.data_manager)
 
-        for i in range(model.steps):
-            model.step()
-
-        results = model.datacollector.get_model_vars_dataframe()
+        results = run_model(model)
         json_result_manager.save_to_json_file(results, agent_type="smart")
 
         """Run Basic Agent"""
-        model = HEMSModel(agent_type="basic")
-
-        for i in range(model.steps):
-            model.step()
+        model = create_model(agent_type="basic")
 
-        results = model.datacollector.get_model_vars_dataframe()
+        results = run_model(model)
         json_result_manager.save_to_json_file(results, agent_type="basic")
 
+        """Run Oracle Agent"""
+        model = create_model(agent_type="oracle")
+
+        results = run_model(model)
+        json_result_manager.save_to_json_file(results, agent_type="oracle")
+
         json_result_manager.calculate_final_results()
 
     elif mode == "train":
@@ -46,6 +48,36 @@ if __name__ == "__main__":
             use_gpu=True
         )
 
+    elif mode == "backfill":
+        from sim.data.backfill import run_backfill
+
+        concurrency = os.getenv("BACKFILL_CONCURRENCY")
+        manifest = run_backfill(
+            start_date=os.getenv("BACKFILL_START", "2025-01-01"),
+            end_date=os.getenv("BACKFILL_END", "2025-12-31"),
+            concurrency=int(concurrency) if concurrency else None
+        )
+        print(f"Backfill finished: {manifest.summary()}")
+
+    elif mode == "synthetic":
+        from sim.data.synthetic_dataset import synthetic_generator
+
+        year = int(os.getenv("SYNTHETIC_YEAR", "2025"))
+        written = synthetic_generator.write_range(
+            start_date=f"{year}-01-01",
+            end_date=f"{year}-12-31",
+            datafiles_dir=os.getenv("SYNTHETIC_DIR", os.path.join(os.path.dirname(__file__), "sim", "data", "datafiles")),
+            binary=os.getenv("SYNTHETIC_FORMAT", "csv") == "binary"
+        )
+        print(f"Wrote {len(written)} synthetic date(s) for {year}")
+
+    elif mode == "export_actor":
+        from sim.agent.smart.numpy_actor import export_actor, check_actor_parity
+
+        model_path = os.getenv("SMART_MODEL_PATH", os.path.join(os.path.dirname(__file__), "sim", "agent", "smart", "models", "best_model.zip"))
+        npz_path = export_actor(model_path)
+        print(f"Exported the actor to {npz_path}, largest difference to SAC.predict: {check_actor_parity(model_path, npz_path):.2e}")
+
     elif mode == "gui_mode":
         import subprocess
         import sys
@@ -54,4 +86,4 @@ if __name__ == "__main__":
         subprocess.run([sys.executable, "-m", "streamlit", "run", gui_path])
 
     else:
-        print("Invalid MODE in .env file. Please set MODE to 'run_model', 'train', 'train_single', or 'gui_mode'.")
+        print("Invalid MODE in .env file. Please set MODE to 'run_model', 'train', 'train_single', 'backfill', 'synthetic', 'export_actor', or 'gui_mode'.")
@@ -0,0 +1,187 @@
+import numpy as np
+
+from log.log_controller import log_controller
+
+# Fixed layout of the flows of one step, every agent returns a float vector in this order
+FLOW_KEYS = (
+    "production_to_consumption",
+    "production_to_battery",
+    "production_to_grid",
+    "battery_to_consumption",
+    "battery_to_grid",
+    "grid_to_battery",
+    "grid_to_consumption",
+)
+
+(PRODUCTION_TO_CONSUMPTION, PRODUCTION_TO_BATTERY, PRODUCTION_TO_GRID,
+ BATTERY_TO_CONSUMPTION, BATTERY_TO_GRID, GRID_TO_BATTERY, GRID_TO_CONSUMPTION) = range(len(FLOW_KEYS))
+
+
+# Flows smaller than this (kWh) count as none
+FLOW_TOLERANCE = 1e-6
+
+
+def new_flows():
+    return np.zeros(len(FLOW_KEYS), dtype=np.float64)
+
+
+def allocate_flows(action, solar_production, consumption, cur_capacity, battery_max_capacity, price, tariff,
+                   tolerance=FLOW_TOLERANCE):
+    """Turn normalized 7-dim actions into energy flows, shared by the training env, SmartAgent and fleets
+
+    Every argument is a scalar or an (N,) array, action is (7,) or (N, 7), all broadcast together.
+    Returns (flows (..., 7) in FLOW_KEYS order, new state of charge, balance delta).
+        - production covers consumption first, then charges the battery, the rest is sold
+        - the battery covers what consumption is left, then sells part of what it still holds
+        - the grid charges the battery and covers any consumption still left
+    """
+    action = np.asarray(action, dtype=np.float64)
+    solar_production = np.asarray(solar_production, dtype=np.float64)
+    consumption = np.asarray(consumption, dtype=np.float64)
+    cur_capacity = np.asarray(cur_capacity, dtype=np.float64)
+
+    # Phase 1: Production allocation
+    production_to_consumption = np.minimum(np.minimum(action[..., PRODUCTION_TO_CONSUMPTION] * consumption,
+                                                      solar_production), consumption)
+    remaining_production = solar_production - production_to_consumption
+    remaining_consumption = consumption - production_to_consumption
+
+    max_battery_charge = battery_max_capacity - cur_capacity
+    production_to_battery = np.minimum(action[..., PRODUCTION_TO_BATTERY] * max_battery_charge, remaining_production)
+    production_to_grid = remaining_production - production_to_battery
+
+    # Phase 2: Battery allocation
+    battery_to_consumption = np.minimum(np.minimum(action[..., BATTERY_TO_CONSUMPTION] * cur_capacity,
+                                                   remaining_consumption), cur_capacity)
+    remaining_consumption = remaining_consumption - battery_to_consumption
+    remaining_battery = cur_capacity - battery_to_consumption
+    battery_to_grid = np.minimum(action[..., BATTERY_TO_GRID] * remaining_battery, remaining_battery)
+
+    # Phase 3: Grid allocation, all consumption left is bought
+    max_battery_charge_remaining = battery_max_capacity - (
+        cur_capacity + production_to_battery - battery_to_consumption - battery_to_grid
+    )
+    grid_to_battery = action[..., GRID_TO_BATTERY] * np.maximum(0.0, max_battery_charge_remaining)
+    grid_to_consumption = np.maximum(0.0, remaining_consumption)
+
+    flows = np.stack([production_to_consumption, production_to_battery, production_to_grid, battery_to_consumption,
+                      battery_to_grid, grid_to_battery, grid_to_consumption], axis=-1)
+    flows[np.abs(flows) < tolerance] = 0.0
+
+    new_capacity = np.clip(cur_capacity + get_battery_change(flows), 0, battery_max_capacity)
+
+    return flows, new_capacity, get_balance_change(flows, price, tariff)
+
+
+def flows_for_battery_change(solar_production, consumption, battery_change):
+    """Flows that move the battery by battery_change (kWh, negative discharges), the grid settles the rest
+
+    Production covers consumption first, a charge takes the surplus before buying and a discharge
+    covers consumption before selling, so energy is never bought and sold in the same step.
+    """
+    solar_production = np.asarray(solar_production, dtype=np.float64)
+    consumption = np.asarray(consumption, dtype=np.float64)
+    battery_change = np.asarray(battery_change, dtype=np.float64)
+
+    production_to_consumption = np.minimum(solar_production, consumption)
+    surplus = solar_production - production_to_consumption
+    deficit = consumption - production_to_consumption
+    charge = np.maximum(battery_change, 0.0)
+    discharge = np.maximum(-battery_change, 0.0)
+
+    production_to_battery = np.minimum(surplus, charge)
+    battery_to_consumption = np.minimum(deficit, discharge)
+
+    return np.stack(np.broadcast_arrays(
+        production_to_consumption,
+        production_to_battery,
+        surplus - production_to_battery,
+        battery_to_consumption,
+        discharge - battery_to_consumption,
+        charge - production_to_battery,
+        deficit - battery_to_consumption,
+    ), axis=-1)
+
+
+def get_balance_change(flows, price, tariff):
+    """Sales at price * tariff minus purchases at price, of (..., 7) flows"""
+    revenue = (flows[..., PRODUCTION_TO_GRID] + flows[..., BATTERY_TO_GRID]) * price * tariff
+    cost = (flows[..., GRID_TO_CONSUMPTION] + flows[..., GRID_TO_BATTERY]) * price
+    return revenue - cost
+
+
+def get_flow_totals(flows):
+    """(production used, consumption covered, battery change) of (..., 7) flows"""
+    flows = np.asarray(flows, dtype=np.float64)
+    acc_production = flows[..., PRODUCTION_TO_CONSUMPTION] + flows[..., PRODUCTION_TO_BATTERY] + flows[..., PRODUCTION_TO_GRID]
+    acc_consumption = flows[..., GRID_TO_CONSUMPTION] + flows[..., PRODUCTION_TO_CONSUMPTION] + flows[..., BATTERY_TO_CONSUMPTION]
+    return acc_production, acc_consumption, get_battery_change(flows)
+
+
+def get_battery_change(flows):
+    return (flows[..., GRID_TO_BATTERY] + flows[..., PRODUCTION_TO_BATTERY]
+            - flows[..., BATTERY_TO_CONSUMPTION] - flows[..., BATTERY_TO_GRID])
+
+
+def check_flows(flows, solar_production, consumption, cur_capacity, battery_max_capacity, tolerance=1e-3):
+    """Boolean (N,) validity of (..., 7) flows, the checks of validate_flows without the logging"""
+    acc_production, acc_consumption, acc_battery = get_flow_totals(flows)
+    new_capacity = np.asarray(cur_capacity, dtype=np.float64) + acc_battery
+
+    return ((acc_production <= np.asarray(solar_production) + tolerance)
+            & (acc_consumption >= np.asarray(consumption) - tolerance)
+            & (new_capacity >= -tolerance)
+            & (new_capacity <= battery_max_capacity + tolerance))
+
+
+#TODO Implement Wind Production Configuration
+def validate_flows(flows, inputs, cur_capacity, cur_hour, battery_max_capacity, log_type="action_validation"):
+    """Check the flow vector of one step against its (price, solar, wind, consumption) inputs"""
+    res = True
+    
+    # Tolerance for floating point comparison
+    TOLERANCE = 1e-3
+
+    price, solar_production, wind_production, consumption = inputs
+    log_controller.log_message(f"Action Validation - Hour: {cur_hour}, Solar Production: {solar_production}, Wind Production: {wind_production}, Consumption: {consumption}", log_type)
+
+    acc_production, acc_consumption, acc_battery = (float(total) for total in get_flow_totals(flows))
+
+    # Validate production doesn't exceed available
+    if acc_production > solar_production + TOLERANCE:
+        log_controller.log_message(f"Action Validation Failed - Production Exceeded: {acc_production} > {solar_production}", log_type)
+        res = False
+
+    # Validate consumption is met (with tolerance)
+    if acc_consumption < consumption - TOLERANCE:
+        log_controller.log_message(f"Action Validation Failed - Consumption Not Suppressed: {acc_consumption} < {consumption}", log_type)
+        res = False
+
+    # Validate battery constraints
+    new_capacity = cur_capacity + acc_battery
+    if new_capacity < -TOLERANCE:
+        log_controller.log_message(f"Action Validation Failed - Battery Capacity Below Zero: {new_capacity} < 0", log_type)
+        res = False
+    
+    if new_capacity > battery_max_capacity + TOLERANCE:
+        log_controller.log_message(f"Action Validation Failed - Battery Capacity Exceeded: {new_capacity} > {battery_max_capacity}", log_type)
+        res = False
+
+    if res:
+        log_controller.log_message(f"Action Validation Passed", log_type)
+
+    return res
+
+
+def flows_to_actions(flows):
+    """Non-zero flows as the [{key: value}, ...] list of the JSON results and the GUI"""
+    return [{key: value} for key, value in zip(FLOW_KEYS, np.asarray(flows).tolist()) if value > 0]
+
+
+def format_actions(flows):
+    """Format the non-zero flows into a string: 'key: value, key: value, ...'"""
+    actions = flows_to_actions(flows)
+    if not actions:
+        return "No actions"
+    
+    return ", ".join(f"{key}: {value:.4f}" for action in actions for key, value in action.items())
@@ -0,0 +1,46 @@
+import os
+
+from sim.agent.baseline.baseline_agent import BaselineAgent
+from sim.agent.oracle.oracle_agent import OracleAgent
+from sim.agent.mpc.mpc_agent import MPCAgent
+
+from log.log_controller import log_controller
+
+
+def create_decision_agent(agent_type, data_manager):
+    """Decision agent of one run, reading its inputs from data_manager (None for unknown types)"""
+    if agent_type == "smart":
+        # Imported on demand, the other agents run without a trained SAC model on disk
+        from sim.agent.smart.smart_agent import SmartAgent
+        # SMART_MODEL_PATH selects the policy, a SAC .zip or its exported .npz actor
+        return SmartAgent(data_manager=data_manager, model_path=os.getenv("SMART_MODEL_PATH"))
+    if agent_type == "basic":
+        return BaselineAgent(data_manager=data_manager)
+    if agent_type == "oracle":
+        return OracleAgent(data_manager=data_manager)
+    if agent_type == "mpc":
+        return MPCAgent(data_manager=data_manager)
+    return None
+
+
+def apply_simulation_configs(simulation_configs, data_manager, decision_agent, log_type="simulation"):
+    """Load the data selected in the simulation configs into data_manager and configure the decision agent"""
+    if simulation_configs.complex_mode:
+        log_controller.add_log("Complex mode is enabled", log_type)
+        # Implement complex mode configurations if needed
+        pass
+    else:
+        if simulation_configs.selected_date:
+            log_controller.add_log(f"Selected date with API: {simulation_configs.selected_date}", log_type)
+            # Send date to data manager to start data collection
+            data_manager.start_data_collection(simulation_configs.selected_date)
+        else:
+            log_controller.add_log("Selected date with own data (uploaded)", log_type)
+            data_manager.set_dataframes(simulation_configs.df_price, 
+                                        simulation_configs.df_solar_production, 
+                                        simulation_configs.df_wind_production, 
+                                        simulation_configs.df_consumption)
+
+    # Every agent decides with the same battery and tariff, so their balances compare
+    if decision_agent is not None:
+        decision_agent.configure(simulation_configs)
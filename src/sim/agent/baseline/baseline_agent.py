@@ -1,26 +1,112 @@
 import os
+import numpy as np
 from dotenv import load_dotenv
 
-from sim.data.data_manager import data_manager
+from sim.agent.actions import (FLOW_KEYS, new_flows, format_actions, get_balance_change, PRODUCTION_TO_CONSUMPTION,
+                               PRODUCTION_TO_BATTERY, PRODUCTION_TO_GRID, BATTERY_TO_CONSUMPTION, GRID_TO_CONSUMPTION)
 from log.log_controller import log_controller
 
 load_dotenv()
 max_capacity = int(os.getenv("MAX_CAPACITY"))
 tariff = float(os.getenv("TARIFF", 0.75))
 
+
+def scan_capacity(net_production, battery_max_capacity, initial_capacity=0.0):
+    """Battery level after every step of cap_{t+1} = clip(cap_t + net_t, 0, max), along the last axis
+
+    Each step is the map x -> clip(x + a, lo, hi), and these maps compose into one of the same form:
+        g(f(x)) = clip(x + a_f + a_g, clip(lo_f + a_g, lo_g, hi_g), clip(hi_f + a_g, lo_g, hi_g))
+    so an inclusive prefix scan of the compositions (log2(steps) array passes) gives every step at once.
+    """
+    net_production = np.asarray(net_production, dtype=np.float64)
+    max_capacity = np.broadcast_to(np.asarray(battery_max_capacity, dtype=np.float64)[..., None], net_production.shape)
+
+    shift = net_production.copy()
+    low = np.zeros_like(net_production)
+    high = max_capacity.copy()
+
+    distance = 1
+    while distance < net_production.shape[-1]:
+        # Step t composed after the prefix ending at t - distance
+        later_shift, later_low, later_high = shift[..., distance:], low[..., distance:], high[..., distance:]
+        new_low = np.minimum(np.maximum(low[..., :-distance] + later_shift, later_low), later_high)
+        new_high = np.minimum(np.maximum(high[..., :-distance] + later_shift, later_low), later_high)
+        new_shift = shift[..., :-distance] + later_shift
+
+        shift[..., distance:], low[..., distance:], high[..., distance:] = new_shift, new_low, new_high
+        distance *= 2
+
+    initial_capacity = np.asarray(initial_capacity, dtype=np.float64)[..., None]
+    return np.minimum(np.maximum(initial_capacity + shift, low), high)
+
+
+def baseline_day(price, solar_production, consumption, battery_max_capacity=max_capacity, tariff=tariff,
+                 initial_capacity=0.0, initial_balance=0.0):
+    """BaselineAgent.policy over whole days at once
+
+    price, solar_production and consumption are (steps,) or (households, steps) arrays, the
+    capacities and balance scalars or (households,). Returns (flows (..., steps, 7) in FLOW_KEYS order,
+    battery level after every step, balance after every step), the values policy gives step by step.
+    """
+    price = np.asarray(price, dtype=np.float64)
+    solar_production = np.asarray(solar_production, dtype=np.float64)
+    consumption = np.asarray(consumption, dtype=np.float64)
+
+    net_production = solar_production - consumption
+    capacity = scan_capacity(net_production, battery_max_capacity, initial_capacity)
+
+    initial = np.broadcast_to(np.asarray(initial_capacity, dtype=np.float64)[..., None], capacity[..., :1].shape)
+    previous_capacity = np.concatenate([initial, capacity[..., :-1]], axis=-1)
+    max_capacity = np.asarray(battery_max_capacity, dtype=np.float64)[..., None]
+
+    surplus = np.maximum(net_production, 0.0)
+    deficit = np.maximum(-net_production, 0.0)
+
+    flows = np.zeros(net_production.shape + (len(FLOW_KEYS),))
+    flows[..., PRODUCTION_TO_CONSUMPTION] = np.minimum(solar_production, consumption)
+    flows[..., PRODUCTION_TO_BATTERY] = np.minimum(surplus, max_capacity - previous_capacity)
+    flows[..., PRODUCTION_TO_GRID] = surplus - flows[..., PRODUCTION_TO_BATTERY]
+    flows[..., BATTERY_TO_CONSUMPTION] = np.minimum(deficit, previous_capacity)
+    flows[..., GRID_TO_CONSUMPTION] = deficit - flows[..., BATTERY_TO_CONSUMPTION]
+
+    # Sales at price * tariff and purchases at price, as policy does
+    balance_change = get_balance_change(flows, price, tariff)
+    balance = np.asarray(initial_balance, dtype=np.float64)[..., None] + np.cumsum(balance_change, axis=-1)
+
+    return flows, capacity, balance
+
+
 class BaselineAgent:
 
     log_type = "baseline_input"
 
-    def __init__(self, battery_max_capacity = max_capacity, tariff = tariff):
+    def __init__(self, data_manager, battery_max_capacity = max_capacity, tariff = tariff):
         self.battery_max_capacity = battery_max_capacity
         self.tariff = tariff
+        self.data_manager = data_manager
+
+    def configure(self, simulation_configs):
+        """Decide with the battery and tariff the model was configured with"""
+        self.battery_max_capacity = simulation_configs.battery_max_capacity
+        self.tariff = simulation_configs.tariff
 
     def baseline_decision(self, balance, cur_capacity, cur_hour):
+        inputs = self.data_manager.get_model_data_entry(time_stamp=cur_hour)
+
+        return self.decide(balance, cur_capacity, cur_hour, inputs)
+
+    def decide_day(self, inputs, cur_capacity=0.0, balance=0.0):
+        """Every step of a day from its (steps, 4) [price, solar, wind, consumption] inputs"""
+        inputs = np.asarray(inputs, dtype=np.float64)
+        return baseline_day(inputs[:, 0], inputs[:, 1], inputs[:, 3], self.battery_max_capacity, self.tariff,
+                            cur_capacity, balance)
+
+    def decide(self, balance, cur_capacity, cur_hour, inputs):
+        """Decision for already fetched (price, solar, wind, consumption) inputs"""
         self.balance = balance
         self.cur_capacity = cur_capacity
         
-        self.price, self.solar_production, self.wind_production, self.consumption = data_manager.get_model_data_entry(time_stamp=cur_hour)
+        self.price, self.solar_production, self.wind_production, self.consumption = inputs
 
         log_controller.log_message(
             f"\nBaseline Decision - Hour: {cur_hour}, Balance: {balance}, Current Capacity: {cur_capacity}",
@@ -37,55 +123,54 @@ class BaselineAgent:
 
     #TODO Implement Wind Production Configuration
     def policy(self):
-        self.actions = []
+        self.actions = new_flows()
 
         if self.solar_production >= self.consumption:
             current_production = self.solar_production - self.consumption
 
-            self.actions.append({"production_to_consumption": self.consumption})
+            self.actions[PRODUCTION_TO_CONSUMPTION] = self.consumption
 
             if current_production + self.cur_capacity >= self.battery_max_capacity:
-                current_production = current_production - (self.battery_max_capacity - self.cur_capacity)
+                battery_charge = self.battery_max_capacity - self.cur_capacity
+                current_production = current_production - battery_charge
                 self.cur_capacity = self.battery_max_capacity
 
-                self.actions.append({"production_to_battery": self.battery_max_capacity - self.cur_capacity})
+                self.actions[PRODUCTION_TO_BATTERY] = battery_charge
 
                 self.balance += current_production * self.price * self.tariff
-                self.actions.append({"production_to_grid": current_production})
+                self.actions[PRODUCTION_TO_GRID] = current_production
 
             else:
                 self.cur_capacity += current_production
-                self.actions.append({"production_to_battery": current_production})
+                self.actions[PRODUCTION_TO_BATTERY] = current_production
 
         else:
             current_consumption = self.consumption - self.solar_production
-            self.actions.append({"production_to_consumption": self.solar_production})
+            self.actions[PRODUCTION_TO_CONSUMPTION] = self.solar_production
 
             if current_consumption <= self.cur_capacity:
                 self.cur_capacity -= current_consumption
-                self.actions.append({"battery_to_consumption": current_consumption})
+                self.actions[BATTERY_TO_CONSUMPTION] = current_consumption
 
             else:
                 current_consumption = current_consumption - self.cur_capacity
-                self.actions.append({"battery_to_consumption": self.cur_capacity})
+                self.actions[BATTERY_TO_CONSUMPTION] = self.cur_capacity
 
                 self.cur_capacity = 0
 
-                self.balance -= current_consumption * self.price * self.tariff
-                self.actions.append({"grid_to_consumption": current_consumption})
-
-
-        print(f"{self.cur_capacity}")
+                # Purchases pay the full price, only sales are at price * tariff
+                self.balance -= current_consumption * self.price
+                self.actions[GRID_TO_CONSUMPTION] = current_consumption
 
         log_controller.log_message(
-            f"Baseline Actions: {self.actions}, Balance: {self.balance}, Battery Capacity: {self.cur_capacity}",
+            f"Baseline Actions: {format_actions(self.actions)}, Balance: {self.balance}, Battery Capacity: {self.cur_capacity}",
             self.log_type
         )
 
         return self.actions, self.balance, self.cur_capacity
     
     '''
-    Label Available:   
+    Flow vector layout (sim.agent.actions.FLOW_KEYS):
         production_action:
             - production_to_consumption
             - production_to_battery
@@ -100,4 +185,38 @@ class BaselineAgent:
             - grid_to_consumption
     '''
 
-baseline_agent = BaselineAgent()
\ No newline at end of file
+
+def check_baseline_day(date=None, interval=60, battery_max_capacity=max_capacity):
+    """Largest difference between baseline_day and policy run step by step on one date's data"""
+    from sim.data.data_manager import DataManager
+
+    data_manager = DataManager(date=date or os.getenv("DATE", "2025-01-01"))
+    inputs = data_manager.get_model_data_batch(list(range(0, 24 * 60 + 1, interval)))
+    agent = BaselineAgent(battery_max_capacity=battery_max_capacity, data_manager=data_manager)
+
+    balance, cur_capacity = 0.0, 0.0
+    step_flows, step_capacity, step_balance = [], [], []
+    for row in inputs.tolist():
+        flows, balance, cur_capacity = agent.decide(balance, cur_capacity, None, row)
+        step_flows.append(flows)
+        step_capacity.append(cur_capacity)
+        step_balance.append(balance)
+
+    flows, capacity, balance = agent.decide_day(inputs)
+    return max(np.abs(flows - np.array(step_flows)).max(),
+               np.abs(capacity - np.array(step_capacity)).max(),
+               np.abs(balance - np.array(step_balance)).max())
+
+
+if __name__ == "__main__":
+    import time
+
+    print(f"Largest difference to the step by step policy: {check_baseline_day(interval=15):.2e}")
+
+    rng = np.random.default_rng(0)
+    households, steps = 10_000, 96
+    start = time.perf_counter()
+    baseline_day(rng.uniform(0.01, 0.2, (households, steps)), rng.uniform(0, 4, (households, steps)),
+                 rng.uniform(0.3, 3, (households, steps)))
+    elapsed = time.perf_counter() - start
+    print(f"{households} household days in {elapsed:.3f}s, {elapsed / households * 1e6:.1f}us per day")
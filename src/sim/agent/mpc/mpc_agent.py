@@ -0,0 +1,152 @@
+import os
+import numpy as np
+from dotenv import load_dotenv
+
+from sim.agent.actions import flows_for_battery_change, get_balance_change, format_actions
+from sim.agent.schedule_solver import ScheduleSolver
+from log.log_controller import log_controller
+
+load_dotenv()
+max_capacity = int(os.getenv("MAX_CAPACITY"))
+tariff = float(os.getenv("TARIFF", 0.75))
+
+interval_str = os.getenv("INTERVAL", "1,0")
+hour_interval, minute_interval = map(int, interval_str.split(","))
+
+MPC_HORIZON_HOURS = float(os.getenv("MPC_HORIZON_HOURS", "12"))
+# The value table of a solve is reused for this long before solving again, 0 solves every step
+MPC_REPLAN_HOURS = float(os.getenv("MPC_REPLAN_HOURS", "3"))
+MPC_SOC_LEVELS = int(os.getenv("MPC_SOC_LEVELS", "101"))
+# Relative error of the solar and consumption forecast, 0 forecasts the day's data exactly
+MPC_FORECAST_ERROR = float(os.getenv("MPC_FORECAST_ERROR", "0.0"))
+
+
+class MPCAgent:
+    """Rolling horizon controller: every step optimises the next hours and applies only the first step.
+
+    The day-ahead forecast (market prices are known a day ahead, solar and consumption come from the
+    day's data with an optional relative error) is made once per day, together with the solver grid
+    and the gains of every step. A solve keeps the value of every stage of a window up to a replan
+    interval longer than the horizon, the next decisions shift along it and only a decision left with
+    less than the horizon solves again, so no decision sees less than the horizon ahead.
+    """
+
+    log_type = "mpc_input"
+
+    def __init__(self, data_manager, battery_max_capacity=max_capacity, tariff=tariff,
+                 interval=hour_interval * 60 + minute_interval, horizon_hours=MPC_HORIZON_HOURS,
+                 replan_hours=MPC_REPLAN_HOURS, levels=MPC_SOC_LEVELS, forecast_error=MPC_FORECAST_ERROR, seed=0):
+        self.battery_max_capacity = battery_max_capacity
+        self.tariff = tariff
+        self.data_manager = data_manager
+        self.interval = interval
+        self.horizon_hours = horizon_hours
+        self.replan_hours = replan_hours
+        self.levels = levels
+        self.forecast_error = forecast_error
+        self.seed = seed
+
+        self.solver = None
+        self.step_index = None
+
+    def configure(self, simulation_configs):
+        """Plan with the battery and interval the model was configured with"""
+        self.battery_max_capacity = simulation_configs.battery_max_capacity
+        self.tariff = simulation_configs.tariff
+        self.interval = simulation_configs.interval
+        self.step_index = None
+
+    def prepare_day(self):
+        """Forecast the day and precompute everything the decisions of the day share"""
+        if self.solver is None or self.solver.battery_max_capacity != self.battery_max_capacity:
+            self.solver = ScheduleSolver(self.battery_max_capacity, self.levels)
+
+        boundaries = self.data_manager.get_step_boundaries(0, self.interval)
+        forecast = self.data_manager.get_model_data_batch(boundaries)
+
+        if self.forecast_error > 0:
+            rng = np.random.default_rng(self.seed)
+            forecast[:, 1:] *= rng.lognormal(0.0, self.forecast_error, forecast[:, 1:].shape)
+
+        self.forecast = forecast
+        self.gains = self.solver.get_gains(forecast[:, 0], forecast[:, 1], forecast[:, 3], self.tariff)
+        self.horizon = max(1, int(round(self.horizon_hours * 60 / self.interval)))
+        self.replan = max(1, int(round(self.replan_hours * 60 / self.interval)))
+
+        # Values of the stages table_start.. of the last solve, none before the first decision
+        self.values = None
+        self.table_start = None
+
+        # Energy left after the horizon is worth selling at the average price of the rest of the day
+        price_sums = np.concatenate([np.cumsum(forecast[::-1, 0])[::-1], [0.0]])
+        remaining_steps = np.arange(len(forecast), -1, -1)
+        self.tail_prices = np.divide(price_sums, remaining_steps, out=np.zeros_like(price_sums),
+                                     where=remaining_steps > 0)
+
+        self.step_index = {minutes: index for index, minutes in enumerate((boundaries[1:] % 1440).tolist())}
+
+    def get_terminal_value(self, end):
+        return self.solver.grid * self.tail_prices[end] * self.tariff
+
+    def get_next_value(self, index):
+        """Value of every level after step index, shifted along the last solve while it reaches far enough"""
+        steps = len(self.forecast)
+        stage = index + 1
+
+        if self.values is not None and self.table_start <= stage:
+            table_end = self.table_start + len(self.values) - 1
+            if table_end >= min(index + self.horizon, steps):
+                return self.values[stage - self.table_start]
+
+        # The steps after this one, from the forecast, a replan interval past the horizon
+        end = min(index + self.horizon + self.replan - 1, steps)
+        self.values = self.solver.value_table(self.gains[stage:end], self.get_terminal_value(end))
+        self.table_start = stage
+
+        return self.values[0]
+
+    def mpc_decision(self, balance, cur_capacity, cur_hour):
+        inputs = self.data_manager.get_model_data_entry(time_stamp=cur_hour)
+
+        return self.decide(balance, cur_capacity, cur_hour, inputs)
+
+    def decide(self, balance, cur_capacity, cur_hour, inputs):
+        """Optimise the horizon from the actual battery level and inputs, apply its first step"""
+        minutes = cur_hour[0] * 60 + cur_hour[1]
+        if self.step_index is None or minutes not in self.step_index:
+            self.prepare_day()
+
+        index = self.step_index[minutes]
+        next_value = self.get_next_value(index)
+
+        # This step is observed, solved exactly from the actual battery level
+        price, solar_production, wind_production, consumption = inputs
+        target = self.solver.first_level(cur_capacity, price, solar_production, consumption, self.tariff, next_value)
+
+        actions = flows_for_battery_change(solar_production, consumption, target - cur_capacity)
+        balance += float(get_balance_change(actions, price, self.tariff))
+
+        log_controller.log_message(
+            f"MPC Actions - Hour: {cur_hour}, {format_actions(actions)}, Balance: {balance}, Battery Capacity: {target}",
+            self.log_type
+        )
+
+        return actions, balance, float(target)
+
+
+if __name__ == "__main__":
+    import time
+    from sim.data.data_manager import DataManager
+
+    data_manager = DataManager(date=os.getenv("DATE", "2025-01-01"))
+    agent = MPCAgent(data_manager=data_manager, interval=15)
+
+    balance, cur_capacity = 0.0, 0.0
+    boundaries = DataManager.get_step_boundaries(0, 15)
+    inputs = data_manager.get_model_data_batch(boundaries)
+
+    start = time.perf_counter()
+    for minutes, row in zip(boundaries[1:] % 1440, inputs.tolist()):
+        _, balance, cur_capacity = agent.decide(balance, cur_capacity, divmod(int(minutes), 60), row)
+    elapsed = time.perf_counter() - start
+    print(f"MPC balance {balance:.4f}, {elapsed / len(inputs) * 1000:.2f}ms per decision")
@@ -0,0 +1,100 @@
+import os
+from dotenv import load_dotenv
+
+from sim.agent.actions import flows_for_battery_change, get_balance_change, format_actions
+from sim.agent.schedule_solver import ScheduleSolver
+from log.log_controller import log_controller
+
+load_dotenv()
+max_capacity = int(os.getenv("MAX_CAPACITY"))
+tariff = float(os.getenv("TARIFF", 0.75))
+
+interval_str = os.getenv("INTERVAL", "1,0")
+hour_interval, minute_interval = map(int, interval_str.split(","))
+
+# Battery levels of the DP grid, evenly spaced from empty to full
+ORACLE_SOC_LEVELS = int(os.getenv("ORACLE_SOC_LEVELS", "201"))
+
+
+def solve_schedule(price, solar_production, consumption, battery_max_capacity=max_capacity, tariff=tariff,
+                   levels=ORACLE_SOC_LEVELS, initial_capacity=0.0, terminal_value=None):
+    """Best battery level after every step of a day, (levels, balance of the schedule, value of every level)"""
+    return ScheduleSolver(battery_max_capacity, levels).solve(price, solar_production, consumption, tariff,
+                                                              initial_capacity, terminal_value)
+
+
+class OracleAgent:
+    """Perfect foresight agent: knows the whole day and follows its cost-optimal battery schedule.
+
+    Its balance is the upper bound the other agents are judged against.
+    """
+
+    log_type = "oracle_input"
+
+    def __init__(self, data_manager, battery_max_capacity=max_capacity, tariff=tariff,
+                 interval=hour_interval * 60 + minute_interval, levels=ORACLE_SOC_LEVELS):
+        self.battery_max_capacity = battery_max_capacity
+        self.tariff = tariff
+        self.data_manager = data_manager
+        self.interval = interval
+        self.levels = levels
+
+        self.schedule = None
+
+    def configure(self, simulation_configs):
+        """Plan with the battery and interval the model was configured with"""
+        self.battery_max_capacity = simulation_configs.battery_max_capacity
+        self.tariff = simulation_configs.tariff
+        self.interval = simulation_configs.interval
+        self.schedule = None
+
+    def plan_day(self, initial_capacity=0.0):
+        """Solve the day once, {step minutes: battery level after the step}"""
+        boundaries = self.data_manager.get_step_boundaries(0, self.interval)
+        inputs = self.data_manager.get_model_data_batch(boundaries)
+
+        levels, best_balance, _ = solve_schedule(inputs[:, 0], inputs[:, 1], inputs[:, 3], self.battery_max_capacity,
+                                                 self.tariff, self.levels, initial_capacity)
+
+        log_controller.log_message(f"Oracle Schedule - Steps: {len(levels)}, Best Balance: {best_balance}",
+                                   self.log_type)
+
+        self.schedule = dict(zip((boundaries[1:] % 1440).tolist(), levels.tolist()))
+        return self.schedule
+
+    def oracle_decision(self, balance, cur_capacity, cur_hour):
+        inputs = self.data_manager.get_model_data_entry(time_stamp=cur_hour)
+
+        return self.decide(balance, cur_capacity, cur_hour, inputs)
+
+    def decide(self, balance, cur_capacity, cur_hour, inputs):
+        """Flows reaching the planned battery level of the step from the actual one"""
+        minutes = cur_hour[0] * 60 + cur_hour[1]
+        if self.schedule is None or minutes not in self.schedule:
+            self.plan_day(cur_capacity)
+
+        price, solar_production, wind_production, consumption = inputs
+        target = min(max(self.schedule[minutes], 0.0), self.battery_max_capacity)
+
+        actions = flows_for_battery_change(solar_production, consumption, target - cur_capacity)
+        balance += float(get_balance_change(actions, price, self.tariff))
+
+        log_controller.log_message(
+            f"Oracle Actions - Hour: {cur_hour}, {format_actions(actions)}, Balance: {balance}, Battery Capacity: {target}",
+            self.log_type
+        )
+
+        return actions, balance, target
+
+
+if __name__ == "__main__":
+    import time
+    from sim.data.data_manager import DataManager
+
+    boundaries = DataManager.get_step_boundaries(0, 15)
+    data_manager = DataManager(date=os.getenv("DATE", "2025-01-01"))
+    inputs = data_manager.get_model_data_batch(boundaries)
+
+    start = time.perf_counter()
+    _, best_balance, _ = solve_schedule(inputs[:, 0], inputs[:, 1], inputs[:, 3])
+    print(f"Oracle balance {best_balance:.4f} ({len(inputs)} steps) in {time.perf_counter() - start:.3f}s")
@@ -0,0 +1,78 @@
+import numpy as np
+
+
+def get_grid_gains(grid_energy, price, tariff):
+    """Balance change of drawing grid_energy from the grid (negative sells), sales at price * tariff"""
+    return np.where(grid_energy > 0, -grid_energy * price, -grid_energy * price * tariff)
+
+
+class ScheduleSolver:
+    """Backward dynamic programming over an evenly spaced grid of battery levels.
+
+    Any level can follow any other (the flows have no charge rate limit), a step earns sales at
+    price * tariff and pays purchases at price, as every decision agent does. The grid and
+    the transition indices only depend on the battery, so one solver is built once and reused for
+    every day or horizon solved with it.
+    """
+
+    def __init__(self, battery_max_capacity, levels):
+        self.battery_max_capacity = battery_max_capacity
+        self.levels = levels
+
+        self.grid = np.linspace(0.0, battery_max_capacity, levels)
+        # Every battery change between grid levels, (j - i) steps of the grid
+        self.changes = (np.arange(2 * levels - 1) - (levels - 1)) * (battery_max_capacity / (levels - 1))
+        # change_index[i, j] is the column of the gains of going from level i to level j
+        self.change_index = np.arange(levels)[None, :] - np.arange(levels)[:, None] + levels - 1
+        self.rows = np.arange(levels)
+
+    def get_gains(self, price, solar_production, consumption, tariff):
+        """(steps, 2 * levels - 1) balance change of every step and battery change"""
+        price = np.asarray(price, dtype=np.float64)
+        net_consumption = np.asarray(consumption, dtype=np.float64) - np.asarray(solar_production, dtype=np.float64)
+
+        return get_grid_gains(net_consumption[:, None] + self.changes[None, :], price[:, None], tariff)
+
+    def backward(self, gains, terminal_value=None):
+        """(best next level of every step and level, value of every level before the first step)"""
+        value = np.zeros(self.levels) if terminal_value is None else np.asarray(terminal_value, dtype=np.float64)
+
+        choice = np.empty((len(gains), self.levels), dtype=np.int64)
+        for step in range(len(gains) - 1, -1, -1):
+            total = gains[step][self.change_index] + value[None, :]
+            choice[step] = total.argmax(axis=1)
+            value = total[self.rows, choice[step]]
+
+        return choice, value
+
+    def value_table(self, gains, terminal_value=None):
+        """(steps + 1, levels) value of every level before every step, the last row the terminal value"""
+        table = np.empty((len(gains) + 1, self.levels))
+        table[-1] = 0.0 if terminal_value is None else terminal_value
+
+        for step in range(len(gains) - 1, -1, -1):
+            table[step] = (gains[step][self.change_index] + table[step + 1][None, :]).max(axis=1)
+
+        return table
+
+    def get_level_index(self, capacity):
+        return int(np.abs(self.grid - capacity).argmin())
+
+    def solve(self, price, solar_production, consumption, tariff, initial_capacity=0.0, terminal_value=None):
+        """(battery level after every step, balance of the schedule, value of every level at the start)"""
+        choice, value = self.backward(self.get_gains(price, solar_production, consumption, tariff), terminal_value)
+
+        start = self.get_level_index(initial_capacity)
+        level = start
+        path = np.empty(len(choice), dtype=np.int64)
+        for step in range(len(choice)):
+            level = choice[step, level]
+            path[step] = level
+
+        return self.grid[path], float(value[start]), value
+
+    def first_level(self, cur_capacity, price, solar_production, consumption, tariff, next_value):
+        """Best level after one step from an exact (off grid) battery level, given the value of the next levels"""
+        grid_energy = consumption - solar_production + (self.grid - cur_capacity)
+        return self.grid[int((get_grid_gains(grid_energy, price, tariff) + next_value).argmax())]
+
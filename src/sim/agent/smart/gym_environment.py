@@ -1,6 +1,7 @@
 import gymnasium as gym
 from gymnasium import spaces
 import numpy as np
+from sim.agent.actions import allocate_flows
 from sim.data.data_manager import DataManager
 import os
 from dotenv import load_dotenv
@@ -28,12 +29,12 @@ class HEMSEnvironment(gym.Env):
         self.minute_interval = minute_interval
         self.date = date
         
+        # Own data context per environment, parallel envs never share a cursor
         if date:
             self.data_manager = DataManager(date=date)
             self.data_manager.start_data_collection(date)
         else:
-            from sim.data.data_manager import data_manager
-            self.data_manager = data_manager
+            self.data_manager = DataManager()
         
         if max_steps is None:
             total_minutes_per_day = 24 * 60
@@ -148,45 +149,18 @@ class HEMSEnvironment(gym.Env):
         self.min_price_seen = min(self.min_price_seen, price)
         self.max_price_seen = max(self.max_price_seen, price)
         
-        prod_to_cons_pct = action[0]
-        prod_to_battery_pct = action[1]
-        prod_to_grid_pct = action[2]
-        battery_to_cons_pct = action[3]
-        battery_to_grid_pct = action[4]
-        grid_to_battery_pct = action[5]
-        grid_to_cons_pct = action[6]
-        
-        battery_before = self.cur_capacity
-        
-        production_to_consumption = min(prod_to_cons_pct * consumption, solar, consumption)
-        remaining_production = solar - production_to_consumption
-        remaining_consumption = consumption - production_to_consumption
-        
-        max_battery_charge = self.battery_max_capacity - self.cur_capacity
-        production_to_battery = min(prod_to_battery_pct * max_battery_charge, remaining_production)
-        remaining_production -= production_to_battery
-        
-        production_to_grid = remaining_production
-        
-        battery_to_consumption = min(battery_to_cons_pct * self.cur_capacity, 
-                                    remaining_consumption, self.cur_capacity)
-        remaining_consumption -= battery_to_consumption
-        remaining_battery = self.cur_capacity - battery_to_consumption
-        
-        battery_to_grid = min(battery_to_grid_pct * remaining_battery, remaining_battery)
-        
-        max_battery_charge_remaining = self.battery_max_capacity - (
-            self.cur_capacity + production_to_battery - battery_to_consumption - battery_to_grid
+        flows, new_capacity, step_profit = allocate_flows(
+            action, solar, consumption, self.cur_capacity, self.battery_max_capacity, price, self.tariff
         )
-        grid_to_battery = grid_to_battery_pct * max(0, max_battery_charge_remaining)
-        grid_to_consumption = max(0, remaining_consumption)
+        (production_to_consumption, production_to_battery, production_to_grid, battery_to_consumption,
+         battery_to_grid, grid_to_battery, grid_to_consumption) = flows.tolist()
+        step_profit = float(step_profit)
         
         energy_sold = production_to_grid + battery_to_grid
         energy_bought = grid_to_consumption + grid_to_battery
         
         revenue = energy_sold * price * self.tariff
         cost = energy_bought * price
-        step_profit = revenue - cost
         
         energy_added = production_to_battery + grid_to_battery
         energy_removed = battery_to_consumption + battery_to_grid
@@ -205,8 +179,7 @@ class HEMSEnvironment(gym.Env):
             else:
                 self.battery_cost_basis = new_energy_cost
         
-        battery_net_change = production_to_battery + grid_to_battery - battery_to_consumption - battery_to_grid
-        self.cur_capacity = np.clip(self.cur_capacity + battery_net_change, 0, self.battery_max_capacity)
+        self.cur_capacity = float(new_capacity)
         
         self.balance += step_profit
         
@@ -0,0 +1,127 @@
+import io
+import os
+import numpy as np
+
+from sim.data.datafile_io import atomic_write
+
+'''
+Torch-free inference of the trained SAC policy.
+export_actor reads the deterministic actor out of a stable-baselines3 SAC .zip
+into a small .npz:
+    - layer_<i>_weight / layer_<i>_bias and activations: the latent_pi MLP
+      (net_arch [256, 256, 128], ReLU)
+    - mu_weight / mu_bias: the mean action head
+    - action_low / action_high: the action space the tanh squashed mean is unscaled to
+NumpyActor evaluates it with NumPy only and answers predict() like SAC does, so
+SmartAgent can use either one as its model.
+'''
+
+ACTIVATIONS = {
+    "ReLU": lambda x: np.maximum(x, 0.0),
+    "Tanh": np.tanh,
+    "ELU": lambda x: np.where(x > 0, x, np.expm1(x)),
+    "Identity": lambda x: x,
+}
+
+
+class NumpyActor:
+
+    def __init__(self, path):
+        with np.load(path, allow_pickle=False) as data:
+            self.activations = [str(name) for name in data["activations"]]
+            # Transposed once, a forward pass is x @ weight + bias
+            self.layers = [(np.ascontiguousarray(data[f"layer_{index}_weight"].T), data[f"layer_{index}_bias"])
+                           for index in range(len(self.activations))]
+            self.mu = (np.ascontiguousarray(data["mu_weight"].T), data["mu_bias"])
+            self.action_low = data["action_low"]
+            self.action_high = data["action_high"]
+
+        unknown = set(self.activations) - set(ACTIVATIONS)
+        if unknown:
+            raise ValueError(f"Unsupported activations in {path}: {sorted(unknown)}")
+
+    def forward(self, observations):
+        """tanh squashed mean action in [-1, 1] of (N, obs_dim) float32 observations"""
+        latent = observations
+        for (weight, bias), activation in zip(self.layers, self.activations):
+            latent = ACTIVATIONS[activation](latent @ weight + bias)
+
+        weight, bias = self.mu
+        return np.tanh(latent @ weight + bias)
+
+    def predict(self, observation, state=None, episode_start=None, deterministic=True):
+        """Same call and result as SAC.predict(observation, deterministic=True)"""
+        if not deterministic:
+            raise ValueError("NumpyActor only evaluates the deterministic policy")
+
+        observation = np.asarray(observation, dtype=np.float32)
+        single = observation.ndim == 1
+
+        scaled = self.forward(observation.reshape(1, -1) if single else observation)
+        actions = (self.action_low + 0.5 * (scaled + 1.0) * (self.action_high - self.action_low)).astype(np.float32)
+
+        return (actions[0] if single else actions), state
+
+
+def get_npz_path(model_path):
+    return os.path.splitext(model_path)[0] + ".npz"
+
+
+def export_actor(model_path, npz_path=None):
+    """Write the deterministic actor of a SAC .zip as .npz, next to it by default"""
+    from stable_baselines3 import SAC
+
+    npz_path = npz_path or get_npz_path(model_path)
+    model = SAC.load(model_path, device="cpu")
+    actor = model.policy.actor
+
+    if actor.use_sde:
+        raise ValueError("gSDE actors are not supported by the NumPy export")
+
+    arrays, activations = {}, []
+    for module in actor.latent_pi:
+        name = type(module).__name__
+        if name == "Linear":
+            arrays[f"layer_{len(activations)}_weight"] = module.weight.detach().cpu().numpy()
+            arrays[f"layer_{len(activations)}_bias"] = module.bias.detach().cpu().numpy()
+            # Layers without an activation after them keep Identity
+            activations.append("Identity")
+        else:
+            activations[-1] = name
+
+    arrays["activations"] = np.array(activations)
+    arrays["mu_weight"] = actor.mu.weight.detach().cpu().numpy()
+    arrays["mu_bias"] = actor.mu.bias.detach().cpu().numpy()
+    arrays["action_low"] = model.action_space.low.astype(np.float32)
+    arrays["action_high"] = model.action_space.high.astype(np.float32)
+
+    buffer = io.BytesIO()
+    np.savez(buffer, **arrays)
+    atomic_write(npz_path, buffer.getbuffer())
+
+    return npz_path
+
+
+def check_actor_parity(model_path, npz_path=None, samples=1000, seed=0):
+    """Largest difference between SAC.predict(deterministic=True) and NumpyActor on random observations"""
+    from stable_baselines3 import SAC
+
+    model = SAC.load(model_path, device="cpu")
+    actor = NumpyActor(npz_path or get_npz_path(model_path))
+
+    low = np.nan_to_num(model.observation_space.low, neginf=-1.0)
+    high = np.nan_to_num(model.observation_space.high, posinf=1.0)
+    observations = np.random.default_rng(seed).uniform(low, high, (samples,) + low.shape).astype(np.float32)
+
+    expected, _ = model.predict(observations, deterministic=True)
+    actual, _ = actor.predict(observations, deterministic=True)
+
+    return float(np.abs(expected - actual).max())
+
+
+if __name__ == "__main__":
+    model_path = os.getenv("SMART_MODEL_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                            "models", "best_model.zip"))
+    npz_path = export_actor(model_path)
+    print(f"Exported the actor of {model_path} to {npz_path}")
+    print(f"Largest difference to SAC.predict: {check_actor_parity(model_path, npz_path):.2e}")
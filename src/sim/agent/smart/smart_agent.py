@@ -1,22 +1,39 @@
 import os
+import threading
 from dotenv import load_dotenv
-from stable_baselines3 import SAC
 import numpy as np
 
-from sim.data.data_manager import data_manager
+from sim.agent.smart.numpy_actor import NumpyActor, get_npz_path
+from sim.agent.actions import FLOW_KEYS, allocate_flows, format_actions
 from log.log_controller import log_controller
 
 load_dotenv()
 max_capacity = int(os.getenv("MAX_CAPACITY", "10"))
 tariff = float(os.getenv("TARIFF", "0.75"))
 
+default_model_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "models", "best_model.zip")
+
+
+def get_model_path(model_path=None):
+    """Policy file to load, the actor exported next to a missing SAC .zip when there is one"""
+    model_path = model_path or default_model_path
+    if not os.path.exists(model_path) and os.path.exists(get_npz_path(model_path)):
+        return get_npz_path(model_path)
+    return model_path
+
+
 class SmartAgent:
     
     log_type = "smart_input"
+
+    # Loaded SAC policies (or their NumPy actors) by path, shared by every SmartAgent of the process
+    loaded_models = {}
+    loaded_models_lock = threading.Lock()
     
-    def __init__(self, battery_max_capacity=max_capacity, tariff=tariff, model_path=None):
+    def __init__(self, data_manager, battery_max_capacity=max_capacity, tariff=tariff, model_path=None):
         self.battery_max_capacity = battery_max_capacity
         self.tariff = tariff
+        self.data_manager = data_manager
 
         # Normalization constants (MUST MATCH TRAINING ENVIRONMENT!!!)
         self.max_price = 0.2
@@ -27,24 +44,43 @@ class SmartAgent:
         self.price_high_threshold = 0.08
         self.price_low_threshold = 0.04
 
-        # Load trained model
-        if model_path is None:
-            base_dir = os.path.dirname(os.path.abspath(__file__))
-            model_path = os.path.join(base_dir, "models", "best_model.zip")
-        
-        if os.path.exists(model_path):
-            self.model = SAC.load(model_path)
-            print(f"Loaded SAC model from {model_path}")
-        else:
-            raise FileNotFoundError(
-                f"Model not found at {model_path}."
-            )
+        # Load trained model, a SAC .zip or the NumPy actor (.npz) exported from it
+        self.model = self.load_model(get_model_path(model_path))
+
+    def configure(self, simulation_configs):
+        """Decide with the battery and tariff the model was configured with"""
+        self.battery_max_capacity = simulation_configs.battery_max_capacity
+        self.tariff = simulation_configs.tariff
+
+    @classmethod
+    def load_model(cls, model_path):
+        with cls.loaded_models_lock:
+            if model_path not in cls.loaded_models:
+                if not os.path.exists(model_path):
+                    raise FileNotFoundError(
+                        f"Model not found at {model_path}."
+                    )
+                if model_path.endswith(".npz"):
+                    cls.loaded_models[model_path] = NumpyActor(model_path)
+                    print(f"Loaded NumPy actor from {model_path}")
+                else:
+                    from stable_baselines3 import SAC
+                    cls.loaded_models[model_path] = SAC.load(model_path)
+                    print(f"Loaded SAC model from {model_path}")
+
+            return cls.loaded_models[model_path]
     
     def smart_decision(self, balance, cur_capacity, cur_hour):
+        inputs = self.data_manager.get_model_data_entry(time_stamp=cur_hour)
+
+        return self.decide(balance, cur_capacity, cur_hour, inputs)
+
+    def decide(self, balance, cur_capacity, cur_hour, inputs):
+        """Decision for already fetched (price, solar, wind, consumption) inputs"""
         self.balance = balance
         self.cur_capacity = cur_capacity
         
-        price, solar_production, wind_production, consumption = data_manager.get_model_data_entry(time_stamp=cur_hour)
+        price, solar_production, wind_production, consumption = inputs
         
         self.price = price
         self.solar_production = solar_production
@@ -72,7 +108,7 @@ class SmartAgent:
         actions = self.convert_action_to_flows(action)
         
         log_controller.log_message(
-            f"Smart Actions: {actions}, Balance: {self.balance}, Battery Capacity: {self.cur_capacity}", 
+            f"Smart Actions: {format_actions(actions)}, Balance: {self.balance}, Battery Capacity: {self.cur_capacity}", 
             self.log_type
         )
         
@@ -81,12 +117,25 @@ class SmartAgent:
     def get_observation(self, time_stamp):
         """Convert current state to observation vector (MUST MATCH TRAINING ENVIRONMENT!!!)"""
         hour, minute = time_stamp
+
+        return self.get_observations(self.cur_capacity, self.price, self.solar_production, self.consumption,
+                                     hour, minute)
+
+    def get_observations(self, cur_capacity, price, solar_production, consumption, hour, minute,
+                         battery_max_capacity=None):
+        """Observation rows of many households or configurations at once, (N, 10) for (N,) arguments"""
+        if battery_max_capacity is None:
+            battery_max_capacity = self.battery_max_capacity
+
+        price = np.asarray(price, dtype=np.float64)
+        hour = np.asarray(hour, dtype=np.float64)
+        minute = np.asarray(minute, dtype=np.float64)
         
         # Normalize values
-        battery_normalized = self.cur_capacity / self.battery_max_capacity
-        price_normalized = min(self.price / self.max_price, 1.0)
-        solar_normalized = min(self.solar_production / self.max_production, 1.0)
-        consumption_normalized = min(self.consumption / self.max_consumption, 1.0)
+        battery_normalized = np.asarray(cur_capacity, dtype=np.float64) / battery_max_capacity
+        price_normalized = np.minimum(price / self.max_price, 1.0)
+        solar_normalized = np.minimum(np.asarray(solar_production, dtype=np.float64) / self.max_production, 1.0)
+        consumption_normalized = np.minimum(np.asarray(consumption, dtype=np.float64) / self.max_consumption, 1.0)
         
         # Cyclical time encoding
         hour_sin = np.sin(2 * np.pi * hour / 24)
@@ -95,10 +144,10 @@ class SmartAgent:
         minute_cos = np.cos(2 * np.pi * minute / 60)
         
         # Price indicators
-        price_high_signal = 1.0 if self.price > self.price_high_threshold else 0.0
-        price_low_signal = 1.0 if self.price < self.price_low_threshold else 0.0
+        price_high_signal = (price > self.price_high_threshold).astype(np.float64)
+        price_low_signal = (price < self.price_low_threshold).astype(np.float64)
         
-        return np.array([
+        return np.stack(np.broadcast_arrays(
             battery_normalized,
             price_normalized,
             solar_normalized,
@@ -109,121 +158,60 @@ class SmartAgent:
             minute_cos,
             price_high_signal,
             price_low_signal,
-        ], dtype=np.float32)
+        ), axis=-1).astype(np.float32)
+
+    def decide_batch(self, balance, cur_capacity, cur_hour, inputs, battery_max_capacity=None):
+        """Decisions of N households in one policy forward pass
+
+        balance and cur_capacity are (N,), cur_hour one (hour, minute) or (N, 2), inputs (N, 4)
+        [price, solar, wind, consumption], battery_max_capacity a scalar or (N,).
+        Returns (flows (N, 7), balance (N,), battery capacity (N,)).
+        """
+        if battery_max_capacity is None:
+            battery_max_capacity = self.battery_max_capacity
+
+        inputs = np.atleast_2d(np.asarray(inputs, dtype=np.float64))
+        price, solar_production, wind_production, consumption = inputs.T
+        hour, minute = np.asarray(cur_hour).T
+
+        observations = self.get_observations(cur_capacity, price, solar_production, consumption, hour, minute,
+                                             battery_max_capacity)
+        actions, _ = self.model.predict(observations, deterministic=True)
+
+        flows, new_capacity, balance_change = allocate_flows(actions, solar_production, consumption, cur_capacity,
+                                                             battery_max_capacity, price, self.tariff)
+        return flows, np.asarray(balance, dtype=np.float64) + balance_change, new_capacity
+
+    def decide_days(self, inputs, step_times, cur_capacity=0.0, balance=0.0, battery_max_capacity=None):
+        """Whole days of N households, one forward pass per step for all of them
+
+        inputs is (N, steps, 4), step_times the (hour, minute) of every step.
+        Returns (flows (N, steps, 7), battery capacity (N, steps), balance (N, steps)).
+        """
+        inputs = np.asarray(inputs, dtype=np.float64)
+        households, steps = inputs.shape[:2]
+
+        flows = np.empty((households, steps, len(FLOW_KEYS)))
+        capacity = np.empty((households, steps))
+        balances = np.empty((households, steps))
+
+        cur_capacity = np.broadcast_to(np.asarray(cur_capacity, dtype=np.float64), (households,))
+        balance = np.broadcast_to(np.asarray(balance, dtype=np.float64), (households,))
+        for step, cur_hour in enumerate(step_times):
+            flows[:, step], balance, cur_capacity = self.decide_batch(balance, cur_capacity, cur_hour, inputs[:, step],
+                                                                      battery_max_capacity)
+            capacity[:, step], balances[:, step] = cur_capacity, balance
+
+        return flows, capacity, balances
     
     def convert_action_to_flows(self, action):
-        """Convert normalized action to actual energy flows (all 7 actions)"""
-        actions = []
-        
-        # Tolerance for floating point operations
-        TOLERANCE = 1e-6
-        
-        # Extract action percentages
-        prod_to_cons_pct = float(action[0])
-        prod_to_battery_pct = float(action[1])
-        prod_to_grid_pct = float(action[2])
-        battery_to_cons_pct = float(action[3])
-        battery_to_grid_pct = float(action[4])
-        grid_to_battery_pct = float(action[5])
-        grid_to_cons_pct = float(action[6])
-        
-        # Phase 1: Production allocation
-        # Production to consumption
-        production_to_consumption = min(
-            prod_to_cons_pct * self.consumption, 
-            self.solar_production, 
-            self.consumption
-        )
-        remaining_production = self.solar_production - production_to_consumption
-        remaining_consumption = self.consumption - production_to_consumption
-        
-        # Production to battery
-        max_battery_charge = self.battery_max_capacity - self.cur_capacity
-        production_to_battery = min(
-            prod_to_battery_pct * max_battery_charge, 
-            remaining_production
-        )
-        remaining_production -= production_to_battery
-        
-        # Production to grid
-        production_to_grid = min(
-            prod_to_grid_pct * remaining_production, 
-            remaining_production
-        )
-        
-        # Phase 2: Battery allocation
-        # Battery to consumption
-        battery_to_consumption = min(
-            battery_to_cons_pct * self.cur_capacity,
-            remaining_consumption,
-            self.cur_capacity
-        )
-        remaining_consumption -= battery_to_consumption
-        remaining_battery = self.cur_capacity - battery_to_consumption
-        
-        # Battery to grid
-        battery_to_grid = min(
-            battery_to_grid_pct * remaining_battery, 
-            remaining_battery
+        """Convert normalized action to the flow vector of the 7 actions (FLOW_KEYS order)"""
+        actions, new_capacity, balance_change = allocate_flows(
+            action, self.solar_production, self.consumption, self.cur_capacity,
+            self.battery_max_capacity, self.price, self.tariff
         )
-        
-        # Phase 3: Grid allocation
-        # Grid to battery (buy cheap energy to store)
-        max_battery_charge_remaining = self.battery_max_capacity - (
-            self.cur_capacity + production_to_battery - battery_to_consumption - battery_to_grid
-        )
-        grid_to_battery = grid_to_battery_pct * max(0, max_battery_charge_remaining)
-        
-        # Grid to consumption (buy energy for immediate use) - ENSURE ALL CONSUMPTION IS MET
-        grid_to_consumption = max(0, remaining_consumption)
-        
-        # Clamp to zero if very small (floating point errors)
-        if abs(grid_to_consumption) < TOLERANCE:
-            grid_to_consumption = 0
-        if abs(production_to_consumption) < TOLERANCE:
-            production_to_consumption = 0
-        if abs(production_to_battery) < TOLERANCE:
-            production_to_battery = 0
-        if abs(production_to_grid) < TOLERANCE:
-            production_to_grid = 0
-        if abs(battery_to_consumption) < TOLERANCE:
-            battery_to_consumption = 0
-        if abs(battery_to_grid) < TOLERANCE:
-            battery_to_grid = 0
-        if abs(grid_to_battery) < TOLERANCE:
-            grid_to_battery = 0
-        
-        # Update balance and capacity
-        revenue_from_production = production_to_grid * self.price * self.tariff
-        revenue_from_battery = battery_to_grid * self.price * self.tariff
-        cost_for_consumption = grid_to_consumption * self.price
-        cost_for_battery = grid_to_battery * self.price
-        
-        self.balance += revenue_from_production + revenue_from_battery
-        self.balance -= cost_for_consumption + cost_for_battery
-        
-        battery_net_change = production_to_battery + grid_to_battery - battery_to_consumption - battery_to_grid
-        self.cur_capacity += battery_net_change
-        
-        # Clamp battery capacity
-        self.cur_capacity = max(0, min(self.cur_capacity, self.battery_max_capacity))
-        
-        # Build actions list (all 7 actions)
-        if production_to_consumption > TOLERANCE:
-            actions.append({"production_to_consumption": production_to_consumption})
-        if production_to_battery > TOLERANCE:
-            actions.append({"production_to_battery": production_to_battery})
-        if production_to_grid > TOLERANCE:
-            actions.append({"production_to_grid": production_to_grid})
-        if battery_to_consumption > TOLERANCE:
-            actions.append({"battery_to_consumption": battery_to_consumption})
-        if battery_to_grid > TOLERANCE:
-            actions.append({"battery_to_grid": battery_to_grid})
-        if grid_to_battery > TOLERANCE:
-            actions.append({"grid_to_battery": grid_to_battery})
-        if grid_to_consumption > TOLERANCE:
-            actions.append({"grid_to_consumption": grid_to_consumption})
+
+        self.balance += float(balance_change)
+        self.cur_capacity = float(new_capacity)
         
         return actions
-
-smart_agent = SmartAgent()
\ No newline at end of file
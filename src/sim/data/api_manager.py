@@ -1,63 +1,278 @@
 import requests
+from requests.adapters import HTTPAdapter
 from typing import Dict
 
 import os
+import time
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date as date_type, timedelta
 from dotenv import load_dotenv
 
 import pandas as pd
-import random
+
+try:
+    from .datafile_io import write_sidecar
+    from .dataset_store import dataset_store
+    from .response_cache import ResponseCache
+    from .consumption_generator import consumption_generator
+except ImportError:
+    from datafile_io import write_sidecar
+    from dataset_store import dataset_store
+    from response_cache import ResponseCache
+    from consumption_generator import consumption_generator
+
+load_dotenv()
+
+# Point the API at another server, e.g. the local stub of ren_stub_server.py
+REN_API_BASE_URL = os.getenv("REN_API_BASE_URL")
+
+API_CONCURRENCY = int(os.getenv("API_CONCURRENCY", "4"))
+API_RATE_LIMIT = float(os.getenv("API_RATE_LIMIT", "4"))
+
+API_CACHE_TTL = float(os.getenv("API_CACHE_TTL", str(7 * 24 * 3600)))
+API_RETRIES = int(os.getenv("API_RETRIES", "3"))
+API_BACKOFF = float(os.getenv("API_BACKOFF", "0.5"))
+API_OFFLINE = os.getenv("API_OFFLINE", "false").lower() in ("1", "true", "yes")
+
+# Status codes worth retrying, everything else fails at once
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+
+def get_date_range(start_date: str, end_date: str):
+    """Every ISO date from start_date to end_date, inclusive"""
+    day = date_type.fromisoformat(start_date)
+    last_day = date_type.fromisoformat(end_date)
+
+    dates = []
+    while day <= last_day:
+        dates.append(day.isoformat())
+        day += timedelta(days=1)
+    return dates
+
+
+class APIRequestError(Exception):
+    """A REN API response could not be obtained from the network nor the cache"""
+
+
+class RateLimiter:
+    """Spaces calls from every thread at least 1 / rate seconds apart (rate <= 0 disables it)"""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self.next_time = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if self.interval == 0.0:
+            return
+
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self.next_time)
+            self.next_time = slot + self.interval
+
+        if slot > now:
+            time.sleep(slot - now)
+
 
 class APIManager:
     BASE_URL = "https://servicebus.ren.pt/datahubapi"
 
-    def __init__(self, lang = "en-US"):
+    def __init__(self, lang = "en-US", base_url=None, concurrency=API_CONCURRENCY, rate_limit=API_RATE_LIMIT,
+                 offline=API_OFFLINE, retries=API_RETRIES, backoff=API_BACKOFF, cache_ttl=API_CACHE_TTL,
+                 datafiles_dir=None, store=None):
         self.lang = lang
+        self.base_url = (base_url or REN_API_BASE_URL or self.BASE_URL).rstrip("/")
+        self.concurrency = concurrency
+        self.rate_limiter = RateLimiter(rate_limit)
+
+        self.offline = offline
+        self.retries = retries
+        self.backoff = backoff
+
+        # One pooled session shared by every prefetch thread
         self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max(concurrency, 1), pool_maxsize=max(concurrency, 1))
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
 
         self.base_dir = os.path.dirname(os.path.abspath(__file__))
-        self.datafiles_dir = os.path.join(self.base_dir, "datafiles")
+        self.datafiles_dir = datafiles_dir or os.path.join(self.base_dir, "datafiles")
+        self.store = store if store is not None else dataset_store
         
         self.price_data_filename = "market_prices.csv"
         self.solar_data_filename = "solar_production.csv"
         self.wind_data_filename = "wind_production.csv"
         self.consumption_data_filename = "consumption.csv"
 
-    def _make_request(self, endpoint: str, params: Dict) -> Dict:
+        # Raw responses, hidden from the date folder scans
+        self.response_cache = ResponseCache(os.path.join(self.datafiles_dir, ".api_cache"), cache_ttl)
+
+    def _make_request(self, endpoint: str, params: Dict, offline=None) -> Dict:
         params["culture"] = self.lang
-        url = f"{self.BASE_URL}/{endpoint}"
-        
-        try:
-            response = self.session.get(url, params=params, timeout=30)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            print(f"Erro ao consultar API: {e}")
-        return None    
+        url = f"{self.base_url}/{endpoint}"
+
+        entry = self.response_cache.get(endpoint, params)
+
+        offline = self.offline if offline is None else offline
+        if offline:
+            if entry is None:
+                raise APIRequestError(f"{endpoint} {params} is not cached and the API is offline")
+            return entry["body"]
+
+        if self.response_cache.is_fresh(entry):
+            return entry["body"]
+
+        # Revalidate a stale entry instead of downloading it again
+        headers = {}
+        if entry is not None and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry is not None and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+        error = None
+        for attempt in range(self.retries + 1):
+            if attempt > 0:
+                time.sleep(self.backoff * 2 ** (attempt - 1))
+
+            self.rate_limiter.wait()
+            try:
+                response = self.session.get(url, params=params, headers=headers, timeout=30)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                error = e
+                continue
+
+            if response.status_code == 304 and entry is not None:
+                return self.response_cache.touch(entry)["body"]
+
+            if response.status_code in RETRY_STATUS_CODES:
+                error = f"HTTP {response.status_code}"
+                continue
+
+            try:
+                response.raise_for_status()
+                body = response.json()
+            except (requests.exceptions.RequestException, ValueError) as e:
+                error = e
+                break
+
+            self.response_cache.put(endpoint, params, body, response.headers.get("ETag"),
+                                    response.headers.get("Last-Modified"))
+            return body
+
+        if entry is not None:
+            print(f"Erro ao consultar API: {error}, a usar a resposta em cache")
+            return entry["body"]
+
+        raise APIRequestError(f"Erro ao consultar API: {endpoint} {params}: {error}")
     
-    def get_daily_price(self, date: str):
+    def get_daily_price(self, date: str, offline=None):
         data = self._make_request(
             "electricity/ElectricityMarketPricesDaily",
-            {"date": date}
+            {"date": date},
+            offline
         )
         return data
     
-    def get_daily_production_breakdown(self, date: str):
+    def get_daily_production_breakdown(self, date: str, offline=None):
         data = self._make_request(
             "electricity/ElectricityProductionBreakdownDaily",
-            {"date": date}
+            {"date": date},
+            offline
         )
         return data
     
-    def generate_data(self, date: str):
-        price_data = self.get_daily_price(date)
-        production_data = self.get_daily_production_breakdown(date)
+    def generate_data(self, date: str, offline=None):
+        price_data = self.get_daily_price(date, offline)
+        production_data = self.get_daily_production_breakdown(date, offline)
         
         folder_path = os.path.join(self.datafiles_dir, date)
-        os.makedirs(folder_path, exist_ok=True)
+        os.makedirs(self.datafiles_dir, exist_ok=True)
+
+        # Build the folder under a temporary name, a crash never leaves a half-written date
+        tmp_path = tempfile.mkdtemp(dir=self.datafiles_dir, prefix=f".{date}-")
+        try:
+            df_price = self.gen_market_data(price_data, tmp_path)
+            df_solar, df_wind = self.gen_production_data(production_data, tmp_path)
+            df_consumption = self.gen_consumption_data(tmp_path, date)
+
+            write_sidecar(tmp_path, (df_price, df_solar, df_wind, df_consumption))
+
+            os.chmod(tmp_path, 0o755)
+            if os.path.isdir(folder_path):
+                shutil.rmtree(folder_path)
+            os.replace(tmp_path, folder_path)
+        except BaseException:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            raise
+
+        self.store.append(date, (df_price, df_solar, df_wind, df_consumption))
+
+    def is_date_complete(self, date: str):
+        folder_path = os.path.join(self.datafiles_dir, date)
+        return all(os.path.isfile(os.path.join(folder_path, filename)) for filename in (
+            self.price_data_filename, self.solar_data_filename,
+            self.wind_data_filename, self.consumption_data_filename))
 
-        self.gen_market_data(price_data, folder_path)
-        self.gen_production_data(production_data, folder_path)
-        self.gen_consumption_data(folder_path)
+    def prefetch_range(self, start_date: str, end_date: str, concurrency=None, overwrite=False):
+        """Download every date between start_date and end_date (inclusive)"""
+        return self.prefetch_dates(get_date_range(start_date, end_date), concurrency, overwrite)
+
+    def prefetch_dates(self, dates, concurrency=None, overwrite=False, on_result=None):
+        """Download the given dates on a thread pool, skipping the complete ones.
+
+        Interrupted runs can simply be started again: a date is either fully
+        written or absent. on_result(date, error) is called as each download
+        finishes, error being None on success.
+        Returns {"done": [...], "skipped": [...], "failed": {date: error}}.
+        """
+        result = {"done": [], "skipped": [], "failed": {}}
+
+        pending = []
+        for date in dates:
+            if not overwrite and self.is_date_complete(date):
+                result["skipped"].append(date)
+            else:
+                pending.append(date)
+
+        with ThreadPoolExecutor(max_workers=max(concurrency or self.concurrency, 1)) as executor:
+            futures = {executor.submit(self.generate_data, date): date for date in pending}
+
+            for future in as_completed(futures):
+                date = futures[future]
+                try:
+                    future.result()
+                    result["done"].append(date)
+                    error = None
+                except Exception as e:
+                    print(f"Erro ao gerar dados para {date}: {e}")
+                    result["failed"][date] = error = str(e)
+
+                if on_result is not None:
+                    on_result(date, error)
+
+        order = {date: index for index, date in enumerate(pending)}
+        result["done"].sort(key=order.__getitem__)
+        return result
+
+    def regenerate_cached(self, dates=None):
+        """Rebuild the CSVs of every cached date (or of the given ones) from the raw responses only"""
+        if dates is None:
+            dates = sorted({entry["params"]["date"] for entry in self.response_cache.entries()
+                            if "date" in entry.get("params", {})})
+
+        result = {"done": [], "failed": {}}
+        for date in dates:
+            try:
+                self.generate_data(date, offline=True)
+                result["done"].append(date)
+            except APIRequestError as e:
+                result["failed"][date] = str(e)
+
+        return result
 
 
     def gen_production_data(self, data: Dict, folder_path: str):
@@ -167,50 +382,10 @@ class APIManager:
         
         return df
 
-    def gen_consumption_data(self, folder_path: str):
-        times = [f"{h:02d}:{m:02d}" for h in range(24) for m in [0, 15, 30, 45]]
-        
-        # Consumption pattern (in kW) - typical household
-        # Night (00:00-06:00): Low consumption ~0.5-0.8kW
-        # Morning (06:00-09:00): Rising consumption ~0.8-2.0kW
-        # Midday (09:00-12:00): Moderate ~0.6-1.0kW
-        # Afternoon (12:00-18:00): Moderate ~0.7-1.2kW
-        # Evening peak (18:00-23:00): High ~1.5-3.0kW
-        # Late night (23:00-00:00): Declining ~1.0-0.5kW
-        
-        consumption = []
-        for i, time in enumerate(times):
-            hour = i // 4
-            
-            if 0 <= hour < 6: 
-                base = 0.6
-                variation = 0.1
-            elif 6 <= hour < 9:  
-                base = 0.8 + (hour - 6) * 0.4
-                variation = 0.2
-            elif 9 <= hour < 12: 
-                base = 0.8
-                variation = 0.15
-            elif 12 <= hour < 14: 
-                base = 1.2
-                variation = 0.2
-            elif 14 <= hour < 18: 
-                base = 0.9
-                variation = 0.15
-            elif 18 <= hour < 22: 
-                base = 2.0 + (hour - 18) * 0.2
-                variation = 0.3
-            else:  
-                base = 1.5 - (hour - 22) * 0.4
-                variation = 0.2
-            
-            value = base + random.uniform(-variation, variation)
-            consumption.append(max(0.3, value))  
-        
-        df_consumption = pd.DataFrame({
-            'Time (Hour)': times,
-            'Consumption (kW)': consumption
-        })
+    def gen_consumption_data(self, folder_path: str, date: str = None):
+        # Typical household profile (in kW), reproducible from CONSUMPTION_SEED and the date
+        # (see consumption_generator.HOUSEHOLD_ARCHETYPES for the daily pattern)
+        df_consumption = consumption_generator.generate_dataframe(date)
         
         csv_path = os.path.join(folder_path, self.consumption_data_filename)
         df_consumption.to_csv(csv_path, index=False)
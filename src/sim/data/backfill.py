@@ -0,0 +1,105 @@
+import os
+import json
+import threading
+from datetime import datetime
+
+from dotenv import load_dotenv
+
+try:
+    from .api_manager import api_manager, get_date_range
+    from .datafile_io import atomic_write
+except ImportError:
+    from api_manager import api_manager, get_date_range
+    from datafile_io import atomic_write
+
+'''
+Resumable bulk download of a date range through APIManager.
+Progress is kept in datafiles/backfill_manifest.json, one status per date:
+    - done: all four CSVs were written and checked, skipped on restart without touching the folder
+    - partial: the folder exists but some CSVs are missing, downloaded again
+    - failed: the download raised, retried on the next run
+'''
+load_dotenv()
+
+BACKFILL_MANIFEST_VERSION = 1
+
+
+class BackfillManifest:
+
+    def __init__(self, manifest_path):
+        self.manifest_path = manifest_path
+        self._lock = threading.Lock()
+        self.dates = self.load()
+
+    def load(self):
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+        if manifest.get("version") != BACKFILL_MANIFEST_VERSION:
+            return {}
+        return manifest.get("dates", {})
+
+    def get_status(self, date: str):
+        entry = self.dates.get(date)
+        return entry["status"] if entry else None
+
+    def set_status(self, date: str, status: str, error=None):
+        with self._lock:
+            self.dates[date] = {"status": status, "updated_at": f"{datetime.now():%Y-%m-%dT%H:%M:%S}"}
+            if error is not None:
+                self.dates[date]["error"] = error
+            self.save()
+
+    def save(self):
+        # An interrupted run never loses the manifest
+        atomic_write(self.manifest_path, json.dumps({"version": BACKFILL_MANIFEST_VERSION, "dates": self.dates},
+                                                    indent=4, ensure_ascii=False))
+
+    def summary(self):
+        summary = {"done": 0, "partial": 0, "failed": 0}
+        for entry in self.dates.values():
+            summary[entry["status"]] = summary.get(entry["status"], 0) + 1
+        return summary
+
+
+def run_backfill(start_date: str, end_date: str, concurrency=None, manager=api_manager, manifest_path=None):
+    """Download every date of the range not yet marked done in the manifest"""
+    if manifest_path is None:
+        manifest_path = os.path.join(manager.datafiles_dir, "backfill_manifest.json")
+    manifest = BackfillManifest(manifest_path)
+
+    pending = []
+    for date in get_date_range(start_date, end_date):
+        if manifest.get_status(date) == "done":
+            continue
+
+        if manager.is_date_complete(date):
+            # Downloaded outside of a backfill, only needs recording
+            manifest.set_status(date, "done")
+        else:
+            if os.path.isdir(os.path.join(manager.datafiles_dir, date)):
+                manifest.set_status(date, "partial")
+            pending.append(date)
+
+    def on_result(date, error):
+        if error is not None:
+            manifest.set_status(date, "failed", error)
+        elif manager.is_date_complete(date):
+            manifest.set_status(date, "done")
+        else:
+            manifest.set_status(date, "partial", "missing CSV files after download")
+
+    if pending:
+        print(f"Backfill: {len(pending)} date(s) to download between {start_date} and {end_date}")
+        manager.prefetch_dates(pending, concurrency=concurrency, overwrite=True, on_result=on_result)
+
+    return manifest
+
+
+if __name__ == "__main__":
+    manifest = run_backfill(os.getenv("BACKFILL_START", "2025-01-01"),
+                            os.getenv("BACKFILL_END", "2025-01-31"))
+    print(f"Backfill manifest: {manifest.summary()}")
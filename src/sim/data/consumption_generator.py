@@ -0,0 +1,176 @@
+import io
+import os
+import json
+from datetime import date as date_type
+
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+
+try:
+    from .datafile_io import atomic_write
+except ImportError:
+    from datafile_io import atomic_write
+
+'''
+Synthetic household consumption (kW), many households at once.
+Every household draws from its own RNG stream spawned from (seed, date), so
+a household's profile only depends on the seed, the date and its index.
+An archetype is a list of hourly bands:
+    (start_hour, end_hour, base, slope, variation)
+base + (hour - start_hour) * slope is the mean of the band and samples vary
+uniformly by +/- variation around it.
+'''
+load_dotenv()
+
+CONSUMPTION_SEED = int(os.getenv("CONSUMPTION_SEED", "0"))
+
+HOUSEHOLD_ARCHETYPES = {
+    # Typical household, the profile the API manager always generated
+    "default": [
+        (0, 6, 0.6, 0.0, 0.1),      # Night: low consumption ~0.5-0.8kW
+        (6, 9, 0.8, 0.4, 0.2),      # Morning: rising ~0.8-2.0kW
+        (9, 12, 0.8, 0.0, 0.15),    # Midday: moderate ~0.6-1.0kW
+        (12, 14, 1.2, 0.0, 0.2),    # Lunch
+        (14, 18, 0.9, 0.0, 0.15),   # Afternoon: moderate ~0.7-1.2kW
+        (18, 22, 2.0, 0.2, 0.3),    # Evening peak: high ~1.5-3.0kW
+        (22, 24, 1.5, -0.4, 0.2),   # Late night: declining ~1.0-0.5kW
+    ],
+    # Nobody home during the day, sharper evening peak
+    "working": [
+        (0, 6, 0.5, 0.0, 0.1),
+        (6, 8, 1.0, 0.5, 0.2),
+        (8, 17, 0.4, 0.0, 0.1),
+        (17, 22, 2.2, 0.25, 0.35),
+        (22, 24, 1.4, -0.4, 0.2),
+    ],
+    # Home all day, flatter profile
+    "retired": [
+        (0, 7, 0.5, 0.0, 0.1),
+        (7, 12, 1.0, 0.05, 0.2),
+        (12, 14, 1.5, 0.0, 0.25),
+        (14, 19, 1.0, 0.0, 0.2),
+        (19, 22, 1.6, 0.0, 0.25),
+        (22, 24, 1.0, -0.3, 0.15),
+    ],
+}
+
+
+class ConsumptionGenerator:
+
+    def __init__(self, seed=CONSUMPTION_SEED, archetypes=None, samples_per_hour=4, min_consumption=0.3):
+        self.seed = seed
+        self.archetypes = archetypes if archetypes is not None else HOUSEHOLD_ARCHETYPES
+        self.samples_per_hour = samples_per_hour
+        self.min_consumption = min_consumption
+
+        self.samples = 24 * samples_per_hour
+        # (mean, variation) per sample of every archetype, built once
+        self.profiles = {name: self.build_profile(bands) for name, bands in self.archetypes.items()}
+
+    def build_profile(self, bands):
+        hours = np.arange(self.samples) // self.samples_per_hour
+        base = np.full(self.samples, np.nan)
+        variation = np.full(self.samples, np.nan)
+
+        for start_hour, end_hour, band_base, slope, band_variation in bands:
+            in_band = (hours >= start_hour) & (hours < end_hour)
+            base[in_band] = band_base + (hours[in_band] - start_hour) * slope
+            variation[in_band] = band_variation
+
+        if np.isnan(base).any():
+            raise ValueError("Archetype bands must cover every hour of the day")
+
+        return base, variation
+
+    def get_times(self):
+        minutes = np.arange(self.samples) * (60 // self.samples_per_hour)
+        return [f"{minute // 60:02d}:{minute % 60:02d}" for minute in minutes]
+
+    def get_seed_sequence(self, date=None):
+        if date is None:
+            return np.random.SeedSequence(self.seed)
+        return np.random.SeedSequence([self.seed, date_type.fromisoformat(date).toordinal()])
+
+    @staticmethod
+    def get_child_sequence(seed_sequence, stream):
+        # Fixed children instead of spawn(), whose result depends on how often it was called
+        return np.random.SeedSequence(seed_sequence.entropy, spawn_key=seed_sequence.spawn_key + (stream,))
+
+    def assign_archetypes(self, households, archetypes, seed_sequence):
+        """Archetype index of every household from a name, a list of names or a {name: weight} dict"""
+        names = list(self.profiles)
+
+        if isinstance(archetypes, str):
+            return np.full(households, names.index(archetypes))
+        if isinstance(archetypes, dict):
+            # Own stream, so the mix never shifts the consumption draws
+            weights = np.array([archetypes.get(name, 0.0) for name in names], dtype=np.float64)
+            rng = np.random.default_rng(self.get_child_sequence(seed_sequence, 1))
+            return rng.choice(len(names), size=households, p=weights / weights.sum())
+
+        assignment = np.array([names.index(name) for name in archetypes])
+        if len(assignment) != households:
+            raise ValueError(f"Expected {households} archetypes, got {len(assignment)}")
+        return assignment
+
+    def generate(self, households=1, date=None, archetypes="default"):
+        """(households, samples) consumption in kW of one day"""
+        seed_sequence = self.get_seed_sequence(date)
+        assignment = self.assign_archetypes(households, archetypes, seed_sequence)
+
+        # One independent stream per household, household i always gets the same one
+        household_seeds = self.get_child_sequence(seed_sequence, 0)
+        uniforms = np.empty((households, self.samples))
+        for row, child in enumerate(household_seeds.spawn(households)):
+            uniforms[row] = np.random.default_rng(child).random(self.samples)
+
+        bases = np.stack([self.profiles[name][0] for name in self.profiles])
+        variations = np.stack([self.profiles[name][1] for name in self.profiles])
+        base, variation = bases[assignment], variations[assignment]
+
+        return np.maximum(self.min_consumption, base + (2.0 * uniforms - 1.0) * variation)
+
+    def generate_dataframe(self, date=None, archetype="default"):
+        """One household as the consumption.csv DataFrame"""
+        return pd.DataFrame({
+            'Time (Hour)': self.get_times(),
+            'Consumption (kW)': self.generate(1, date, archetype)[0]
+        })
+
+    def write_binary(self, path, dates, households, archetypes="default", dtype=np.float32):
+        """Write (dates, households, samples) consumption as one .npy plus a .json header
+
+        Much smaller than a CSV per date and household, np.load(path, mmap_mode="r") reads it back.
+        """
+        data = np.empty((len(dates), households, self.samples), dtype=dtype)
+        for index, date in enumerate(dates):
+            data[index] = self.generate(households, date, archetypes)
+
+        buffer = io.BytesIO()
+        np.save(buffer, data)
+        atomic_write(path, buffer.getbuffer())
+
+        header = {"seed": self.seed, "dates": list(dates), "households": households,
+                  "times": self.get_times(), "archetypes": archetypes}
+        with open(os.path.splitext(path)[0] + ".json", "w", encoding="utf-8") as f:
+            json.dump(header, f, indent=4, ensure_ascii=False)
+
+        return data.shape
+
+
+consumption_generator = ConsumptionGenerator()
+
+
+if __name__ == "__main__":
+    import time
+
+    start = time.perf_counter()
+    profiles = consumption_generator.generate(10_000, "2025-01-01", {"default": 0.5, "working": 0.3, "retired": 0.2})
+    print(f"Generated {profiles.shape} in {time.perf_counter() - start:.3f}s, mean {profiles.mean():.3f} kW")
+
+    binary_path = os.getenv("CONSUMPTION_BINARY_PATH")
+    if binary_path:
+        dates = [date_type.fromordinal(date_type(2025, 1, 1).toordinal() + day).isoformat() for day in range(365)]
+        shape = consumption_generator.write_binary(binary_path, dates, int(os.getenv("CONSUMPTION_HOUSEHOLDS", "1000")))
+        print(f"Wrote {shape} consumption to {binary_path}")
@@ -1,18 +1,42 @@
 import os
+import threading
+import numpy as np
 import pandas as pd
 from dotenv import load_dotenv
 from log.log_controller import log_controller
 
 try:
     from .api_manager import api_manager
+    from .dataset_cache import dataset_cache
+    from .datafile_io import SIDECAR_FILENAME, get_csv_paths, parse_total_minutes, read_folder
+    from .dataset_store import dataset_store
+    from .energy_index import EnergyIndex
+    from .synthetic_dataset import synthetic_generator
 except ImportError:
     from api_manager import api_manager
+    from dataset_cache import dataset_cache
+    from datafile_io import SIDECAR_FILENAME, get_csv_paths, parse_total_minutes, read_folder
+    from dataset_store import dataset_store
+    from energy_index import EnergyIndex
+    from synthetic_dataset import synthetic_generator
 
 load_dotenv()
 
 DATE_DEFAULT_DATE = os.getenv("DATE", "2025-01-01")
 
+# Write missing dates with the offline synthetic generator instead of calling the API
+SYNTHESIZE_MISSING_DATES = os.getenv("SYNTHESIZE_MISSING_DATES", "false").lower() in ("1", "true", "yes")
+
+# Several DataManager instances may ask for the same missing date at once
+generation_lock = threading.Lock()
+
 class DataManager:
+    """Per-run data context: the loaded date and the time cursor of one simulation.
+
+    The parsed series are shared read-only between instances through
+    dataset_cache, so every model, agent or environment can own its
+    DataManager without reparsing the date.
+    """
     log_type = "simulation"
 
     def __init__(self, smooth_window=3, date=DATE_DEFAULT_DATE):
@@ -37,11 +61,15 @@ class DataManager:
         self.date = date
         self.last_time_stamp = (0, 0)
 
-        date_folder = os.path.join(self.datafiles_dir, date)
-
-        if not os.path.exists(date_folder) or not os.path.isdir(date_folder):
-            log_controller.add_log(f"Folder for date {date} does not exist", self.log_type)
-            api_manager.generate_data(self.date)
+        if not self.is_date_available(date):
+            with generation_lock:
+                # Another instance may have fetched it while this one waited
+                if not self.is_date_available(date):
+                    log_controller.add_log(f"Data for date {date} is missing or incomplete", self.log_type)
+                    if SYNTHESIZE_MISSING_DATES:
+                        synthetic_generator.write_date(self.date, self.datafiles_dir)
+                    else:
+                        api_manager.generate_data(self.date)
         
         self.get_data_for_date()
         
@@ -54,6 +82,15 @@ class DataManager:
         
         return True
 
+    def is_date_available(self, date: str):
+        """True when the date is in the store or its folder holds all four CSVs"""
+        if dataset_store.has_date(date):
+            return True
+
+        # A half-written folder does not count, it is downloaded again
+        folder_path = os.path.join(self.datafiles_dir, date)
+        return all(os.path.isfile(csv_path) for csv_path in get_csv_paths(folder_path))
+
     def get_model_data_entry(self, time_stamp: tuple = None, date: str = None):
         if time_stamp is None:
             log_controller.add_log("Time stamp must be provided", self.log_type)
@@ -67,39 +104,94 @@ class DataManager:
 
         #log_controller.add_log(f"Time stamp: {time_stamp}", self.log_type)
 
-        price = self.calculate_price_interval(hour, minute)
-        solar_production = self.calculate_solar_production_interval(hour, minute)
-        wind_production = self.calculate_wind_production_interval(hour, minute)
-        consumption = self.calculate_consumption_interval(hour, minute)
+        last_total_minutes, new_total_minutes, interval_hours = self.get_interval_bounds(hour, minute)
+        price, solar_power, wind_power, consumption_power = self.calculate_interval_means(
+            last_total_minutes, new_total_minutes)
+
+        solar_production = solar_power * interval_hours
+        wind_production = wind_power * interval_hours
+        consumption = consumption_power * interval_hours
 
         #log_controller.add_log(f"Price: {price}, Solar production: {solar_production}, Wind production: {wind_production}, Consumption: {consumption}", self.log_type)
 
         return price, solar_production, wind_production, consumption
 
+    def get_model_data_batch(self, boundaries, date: str = None):
+        """Inputs of every step between consecutive boundaries, in one call.
+
+        boundaries: N + 1 step edges in total minutes (see get_step_boundaries).
+        Returns an (N, 4) array of price, solar production, wind production and
+        consumption, the same values N calls to get_model_data_entry would give,
+        without reading or moving last_time_stamp.
+        """
+        if (date is not None and (not hasattr(self, 'date') or self.date != date)) and self.use_api:
+            log_controller.add_log(f"Date {date} is different from {self.date}", self.log_type)
+            self.start_data_collection(date)
+
+        boundaries = np.asarray(boundaries, dtype=np.float64) % 1440
+
+        last_total_minutes = boundaries[:-1]
+        new_total_minutes = np.where(boundaries[1:] < last_total_minutes, boundaries[1:] + 1440, boundaries[1:])
+        interval_hours = (new_total_minutes - last_total_minutes) / 60
+
+        inputs = self.energy_index.interval_means(last_total_minutes, new_total_minutes)
+
+        # Production and consumption are powers until scaled by the step length
+        inputs[:, 1:] *= interval_hours[:, None]
+
+        return inputs
+
+    @staticmethod
+    def get_step_boundaries(hour_interval: int, minute_interval: int):
+        """Step edges in total minutes of a day simulated at the given interval"""
+        interval = hour_interval * 60 + minute_interval
+        steps = 24 * 60 // interval
+
+        return np.arange(steps + 1) * interval
+
     def update_time_stamp(self, new_time_stamp: tuple):
         self.last_time_stamp = new_time_stamp
 
     def get_data_for_date(self):
-        self.df_solar_production = pd.read_csv(os.path.join(
-            self.datafiles_dir, self.date, self.solar_data_filename))
-        self.df_wind_production = pd.read_csv(os.path.join(
-            self.datafiles_dir, self.date, self.wind_data_filename))    
-        self.df_price_data = pd.read_csv(os.path.join(
-            self.datafiles_dir, self.date, self.price_data_filename))
-        self.df_consumption = pd.read_csv(os.path.join(
-            self.datafiles_dir, self.date, self.consumption_data_filename))
-        
-        def parse_time_with_24(time_str):
-            hour, minute = map(int, time_str.split(':'))
-            total_minutes = hour * 60 + minute
-            return total_minutes
-        
-        self.df_solar_production['total_minutes'] = self.df_solar_production.iloc[:, 0].apply(parse_time_with_24)
-        self.df_wind_production['total_minutes'] = self.df_wind_production.iloc[:, 0].apply(parse_time_with_24)
-        self.df_price_data['total_minutes'] = self.df_price_data.iloc[:, 0].apply(parse_time_with_24)
-        self.df_consumption['total_minutes'] = self.df_consumption.iloc[:, 0].apply(parse_time_with_24)
+        folder_path = os.path.join(self.datafiles_dir, self.date)
+        if dataset_store.is_current(self.date, folder_path):
+            # Consolidated store first unless the date folder was rewritten after it
+            file_paths = [dataset_store.get_signature_path(self.date)]
+            loader = self.read_stored_dataset
+        else:
+            file_paths = [os.path.join(folder_path, filename) for filename in (
+                self.price_data_filename, self.solar_data_filename,
+                self.wind_data_filename, self.consumption_data_filename, SIDECAR_FILENAME)]
+            loader = self.read_dataset
+
+        # Parsed datasets are shared between instances, never modify them in place
+        (self.df_price_data, self.df_solar_production, self.df_wind_production,
+         self.df_consumption, self.energy_index) = dataset_cache.get_or_load(
+            (self.datafiles_dir, self.date), file_paths, loader)
+
+    def read_dataset(self, file_paths):
+        # Prefers the binary sidecar (memory mapped) when it is not older than the CSVs
+        return self.build_dataset(read_folder(os.path.dirname(file_paths[-1])))
+
+    def read_stored_dataset(self, file_paths):
+        return self.build_dataset(dataset_store.read_date(self.date))
+
+    def build_dataset(self, dataframes):
+        df_price, df_solar, df_wind, df_consumption = dataframes
+        energy_index = EnergyIndex.from_dataframes(df_price, df_solar, df_wind, df_consumption)
+
+        return df_price, df_solar, df_wind, df_consumption, energy_index
+
+    def get_dataframes_for_range(self, start_date: str, end_date: str):
+        """(price, solar, wind, consumption) DataFrames of every stored date in the range, sliced from the consolidated store"""
+        return dataset_store.read_range(start_date, end_date)
     
-    def calculate_solar_production_interval(self, new_hour: int, new_minute: int):
+    def build_energy_index(self):
+        """Build the columnar prefix-sum store of the four series, once per loaded dataset"""
+        self.energy_index = EnergyIndex.from_dataframes(self.df_price_data, self.df_solar_production,
+                                                        self.df_wind_production, self.df_consumption)
+
+    def get_interval_bounds(self, new_hour: int, new_minute: int):
         last_hour, last_minute = self.last_time_stamp
         
         last_total_minutes = last_hour * 60 + last_minute
@@ -109,194 +201,34 @@ class DataManager:
             new_total_minutes += 1440
         
         interval_hours = (new_total_minutes - last_total_minutes) / 60
-        
-        if new_total_minutes > 1440:
-            mask1 = (self.df_solar_production['total_minutes'] > last_total_minutes) & \
-                   (self.df_solar_production['total_minutes'] <= 1440)
-            interval_data1 = self.df_solar_production[mask1]
-            
-            remainder_minutes = new_total_minutes - 1440
-            mask2 = (self.df_solar_production['total_minutes'] > 0) & \
-                   (self.df_solar_production['total_minutes'] <= remainder_minutes)
-            interval_data2 = self.df_solar_production[mask2]
-            
-            interval_data = pd.concat([interval_data1, interval_data2])
-        else:
-            mask = (self.df_solar_production['total_minutes'] > last_total_minutes) & \
-                  (self.df_solar_production['total_minutes'] <= new_total_minutes)
-            interval_data = self.df_solar_production[mask]
-        
-        production_col = self.df_solar_production.columns[1]
-        
-        if len(interval_data) > 0:
-            avg_power = interval_data[production_col].mean()
-        else:
-            all_minutes = sorted(self.df_solar_production['total_minutes'].unique())
-            max_minute = max(all_minutes)
-            min_minute = min(all_minutes)
-            
-            clamped_last = max(min_minute, min(last_total_minutes, max_minute))
-            clamped_new = max(min_minute, min(new_total_minutes % 1440, max_minute))
-            
-            indexed_production = self.df_solar_production.set_index('total_minutes')[production_col]
-            reindexed = indexed_production.reindex(all_minutes).interpolate(method='linear')
-            
-            start_value = reindexed.reindex([clamped_last], method='nearest')[clamped_last]
-            end_value = reindexed.reindex([clamped_new], method='nearest')[clamped_new]
-            
-            avg_power = (start_value + end_value) / 2
-        
-        energy_production = avg_power * interval_hours
-        
-        return energy_production
+
+        return last_total_minutes, new_total_minutes, interval_hours
+
+    def calculate_interval_means(self, last_total_minutes, new_total_minutes):
+        """Mean price, solar, wind and consumption power over the (last, new] window"""
+        return self.energy_index.interval_means(last_total_minutes, new_total_minutes).tolist()
+
+    def calculate_solar_production_interval(self, new_hour: int, new_minute: int):
+        last_total_minutes, new_total_minutes, interval_hours = self.get_interval_bounds(new_hour, new_minute)
+        _, avg_power, _, _ = self.calculate_interval_means(last_total_minutes, new_total_minutes)
+
+        return avg_power * interval_hours
 
     def calculate_wind_production_interval(self, new_hour: int, new_minute: int):
-        last_hour, last_minute = self.last_time_stamp
-        
-        last_total_minutes = last_hour * 60 + last_minute
-        new_total_minutes = new_hour * 60 + new_minute
-        
-        if new_total_minutes < last_total_minutes:
-            new_total_minutes += 1440
-        
-        interval_hours = (new_total_minutes - last_total_minutes) / 60
-        
-        if new_total_minutes > 1440:
-            mask1 = (self.df_wind_production['total_minutes'] > last_total_minutes) & \
-                   (self.df_wind_production['total_minutes'] <= 1440)
-            interval_data1 = self.df_wind_production[mask1]
-            
-            remainder_minutes = new_total_minutes - 1440
-            mask2 = (self.df_wind_production['total_minutes'] > 0) & \
-                   (self.df_wind_production['total_minutes'] <= remainder_minutes)
-            interval_data2 = self.df_wind_production[mask2]
-            
-            interval_data = pd.concat([interval_data1, interval_data2])
-        else:
-            mask = (self.df_wind_production['total_minutes'] > last_total_minutes) & \
-                  (self.df_wind_production['total_minutes'] <= new_total_minutes)
-            interval_data = self.df_wind_production[mask]
-        
-        production_col = self.df_wind_production.columns[1]
-        
-        if len(interval_data) > 0:
-            avg_power = interval_data[production_col].mean()
-        else:
-            all_minutes = sorted(self.df_wind_production['total_minutes'].unique())
-            max_minute = max(all_minutes)
-            min_minute = min(all_minutes)
-            
-            clamped_last = max(min_minute, min(last_total_minutes, max_minute))
-            clamped_new = max(min_minute, min(new_total_minutes % 1440, max_minute))
-            
-            indexed_production = self.df_wind_production.set_index('total_minutes')[production_col]
-            reindexed = indexed_production.reindex(all_minutes).interpolate(method='linear')
-            
-            start_value = reindexed.reindex([clamped_last], method='nearest')[clamped_last]
-            end_value = reindexed.reindex([clamped_new], method='nearest')[clamped_new]
-            
-            avg_power = (start_value + end_value) / 2
-        
-        energy_production = avg_power * interval_hours
-        
-        return energy_production
+        last_total_minutes, new_total_minutes, interval_hours = self.get_interval_bounds(new_hour, new_minute)
+        _, _, avg_power, _ = self.calculate_interval_means(last_total_minutes, new_total_minutes)
+
+        return avg_power * interval_hours
 
     def calculate_consumption_interval(self, new_hour: int, new_minute: int):
-        last_hour, last_minute = self.last_time_stamp
-        
-        last_total_minutes = last_hour * 60 + last_minute
-        new_total_minutes = new_hour * 60 + new_minute
-        
-        if new_total_minutes < last_total_minutes:
-            new_total_minutes += 1440
-        
-        interval_hours = (new_total_minutes - last_total_minutes) / 60
-        
-        if new_total_minutes > 1440:
-            mask1 = (self.df_consumption['total_minutes'] > last_total_minutes) & \
-                   (self.df_consumption['total_minutes'] <= 1440)
-            interval_data1 = self.df_consumption[mask1]
-            
-            remainder_minutes = new_total_minutes - 1440
-            mask2 = (self.df_consumption['total_minutes'] > 0) & \
-                   (self.df_consumption['total_minutes'] <= remainder_minutes)
-            interval_data2 = self.df_consumption[mask2]
-            
-            interval_data = pd.concat([interval_data1, interval_data2])
-        else:
-            mask = (self.df_consumption['total_minutes'] > last_total_minutes) & \
-                  (self.df_consumption['total_minutes'] <= new_total_minutes)
-            interval_data = self.df_consumption[mask]
-        
-        consumption_col = self.df_consumption.columns[1]
-        
-        if len(interval_data) > 0:
-            avg_power = interval_data[consumption_col].mean()
-        else:
-            all_minutes = sorted(self.df_consumption['total_minutes'].unique())
-            max_minute = max(all_minutes)
-            min_minute = min(all_minutes)
-            
-            clamped_last = max(min_minute, min(last_total_minutes, max_minute))
-            clamped_new = max(min_minute, min(new_total_minutes % 1440, max_minute))
-            
-            indexed_consumption = self.df_consumption.set_index('total_minutes')[consumption_col]
-            reindexed = indexed_consumption.reindex(all_minutes).interpolate(method='linear')
-            
-            start_value = reindexed.reindex([clamped_last], method='nearest')[clamped_last]
-            end_value = reindexed.reindex([clamped_new], method='nearest')[clamped_new]
-            
-            avg_power = (start_value + end_value) / 2
-        
-        energy_consumption = avg_power * interval_hours
-        
-        return energy_consumption
+        last_total_minutes, new_total_minutes, interval_hours = self.get_interval_bounds(new_hour, new_minute)
+        _, _, _, avg_power = self.calculate_interval_means(last_total_minutes, new_total_minutes)
+
+        return avg_power * interval_hours
 
     def calculate_price_interval(self, new_hour: int, new_minute: int):
-        last_hour, last_minute = self.last_time_stamp
-        
-        last_total_minutes = last_hour * 60 + last_minute
-        new_total_minutes = new_hour * 60 + new_minute
-        
-        if new_total_minutes < last_total_minutes:
-            new_total_minutes += 1440
-        
-        if new_total_minutes > 1440:
-            mask1 = (self.df_price_data['total_minutes'] > last_total_minutes) & \
-                   (self.df_price_data['total_minutes'] <= 1440)
-            interval_data1 = self.df_price_data[mask1]
-            
-            remainder_minutes = new_total_minutes - 1440
-            mask2 = (self.df_price_data['total_minutes'] > 0) & \
-                   (self.df_price_data['total_minutes'] <= remainder_minutes)
-            interval_data2 = self.df_price_data[mask2]
-            
-            interval_data = pd.concat([interval_data1, interval_data2])
-        else:
-            mask = (self.df_price_data['total_minutes'] > last_total_minutes) & \
-                  (self.df_price_data['total_minutes'] <= new_total_minutes)
-            interval_data = self.df_price_data[mask]
-        
-        price_col = self.df_price_data.columns[1]
-        
-        if len(interval_data) > 0:
-            mean_price = interval_data[price_col].mean()
-        else:
-            all_minutes = sorted(self.df_price_data['total_minutes'].unique())
-            max_minute = max(all_minutes)
-            min_minute = min(all_minutes)
-            
-            clamped_last = max(min_minute, min(last_total_minutes, max_minute))
-            clamped_new = max(min_minute, min(new_total_minutes % 1440, max_minute))
-            
-            indexed_prices = self.df_price_data.set_index('total_minutes')[price_col]
-            
-            reindexed = indexed_prices.reindex(all_minutes).interpolate(method='linear')
-            
-            start_value = reindexed.reindex([clamped_last], method='nearest')[clamped_last]
-            end_value = reindexed.reindex([clamped_new], method='nearest')[clamped_new]
-            
-            mean_price = (start_value + end_value) / 2
+        last_total_minutes, new_total_minutes, _ = self.get_interval_bounds(new_hour, new_minute)
+        mean_price, _, _, _ = self.calculate_interval_means(last_total_minutes, new_total_minutes)
 
         return mean_price
     
@@ -342,23 +274,16 @@ class DataManager:
         self.df_wind_production = df_wind.copy()
         self.df_consumption = df_consumption.copy()
         
-        def parse_time_with_24(time_str):
-            hour, minute = map(int, time_str.split(':'))
-            total_minutes = hour * 60 + minute
-            return total_minutes
-        
-        self.df_solar_production['total_minutes'] = self.df_solar_production.iloc[:, 0].apply(parse_time_with_24)
-        self.df_wind_production['total_minutes'] = self.df_wind_production.iloc[:, 0].apply(parse_time_with_24)
-        self.df_price_data['total_minutes'] = self.df_price_data.iloc[:, 0].apply(parse_time_with_24)
-        self.df_consumption['total_minutes'] = self.df_consumption.iloc[:, 0].apply(parse_time_with_24)
-
-
-data_manager = DataManager()
+        self.df_solar_production['total_minutes'] = parse_total_minutes(self.df_solar_production.iloc[:, 0])
+        self.df_wind_production['total_minutes'] = parse_total_minutes(self.df_wind_production.iloc[:, 0])
+        self.df_price_data['total_minutes'] = parse_total_minutes(self.df_price_data.iloc[:, 0])
+        self.df_consumption['total_minutes'] = parse_total_minutes(self.df_consumption.iloc[:, 0])
 
+        self.build_energy_index()
 
 
 if __name__ == "__main__":
-    data_manager.start_data_collection("2025-08-25")
+    data_manager = DataManager(date="2025-08-25")
     
     price, solar_prod, wind_prod, consumption = data_manager.get_model_data_entry(
         date="2025-08-25", time_stamp="1:30")
@@ -0,0 +1,423 @@
+import os
+import json
+import shutil
+import struct
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .energy_index import SERIES_NAMES
+except ImportError:
+    from energy_index import SERIES_NAMES
+
+# CSV file of every series, in SERIES_NAMES order
+SERIES_FILENAMES = ("market_prices.csv", "solar_production.csv", "wind_production.csv", "consumption.csv")
+
+'''
+Binary sidecar (series.bin), written next to the CSVs of a date folder:
+    - 8 bytes magic + 4 bytes little endian header length
+    - JSON header: per series its name, column names, length and offset
+    - zero padding up to a multiple of 8 bytes
+    - float64 payload: per series its total_minutes followed by its values
+The payload is memory mapped on load, nothing is parsed.
+'''
+SIDECAR_FILENAME = "series.bin"
+SIDECAR_MAGIC = b"HEMSBIN1"
+SIDECAR_VERSION = 1
+
+
+# Width the strings are truncated to for the clock decoding, one more than "HH:MM:SS"
+# so longer strings are told apart and decoded again at LONG_WIDTH
+CLOCK_WIDTH = 9
+# Fits "YYYY-MM-DDTHH:MM:SS.fffffffff+HH:MM" and clock strings with fractional seconds
+LONG_WIDTH = 36
+
+
+def parse_total_minutes(times):
+    """Vectorized time column -> minutes since midnight.
+
+    Accepts "HH:MM", "HH:MM:SS", ISO timestamps (their time of day) and
+    numeric hours (13, 13.5, "24"), values up to 24:00. Clock strings are
+    decoded from their code points in one NumPy pass, ISO timestamps go
+    through a single to_datetime call. Every malformed row is reported at once in a single
+    ValueError. Returns int64 when all the minutes are whole, float64 otherwise.
+    """
+    times = pd.Series(times)
+
+    if pd.api.types.is_numeric_dtype(times):
+        # Numeric hour column
+        minutes = times.to_numpy(dtype=np.float64, na_value=np.nan) * 60
+    else:
+        # Missing values are malformed like any other unparsable row
+        minutes = parse_clock_strings(times.astype(str))
+
+    out_of_range = (minutes < 0) | (minutes > 24 * 60)
+    malformed = np.isnan(minutes) | out_of_range
+    if malformed.any():
+        rows = np.flatnonzero(malformed)
+        examples = ", ".join(f"row {times.index[row]}: {times.iloc[row]!r}" for row in rows[:10])
+        raise ValueError(
+            f"{len(rows)} malformed time value(s) in column '{times.name}' ({examples}"
+            f"{', ...' if len(rows) > 10 else ''})"
+        )
+
+    if np.all(minutes == np.round(minutes)):
+        return minutes.astype(np.int64)
+    return minutes
+
+
+def get_code_points(text, width):
+    """(N, width) uint32 code points of the strings, truncated or zero padded to width"""
+    return np.asarray(text, dtype=f"U{width}").view(np.uint32).reshape(len(text), width)
+
+
+def decode_clock(codes):
+    """Minutes of "H:MM", "HH:MM" and "HH:MM:SS(.fff)" code point rows, NaN for anything else"""
+    width = codes.shape[1]
+
+    # One digit hours get a leading '0', every row is then laid out as "HH:MM:SS.fff"
+    short_hour = codes[:, 1] == ord(":")
+    if short_hour.any():
+        # Rows filling the width may have been truncated, the shift must not hide that
+        short_hour &= codes[:, -1] == 0
+        codes = codes.copy()
+        codes[short_hour] = np.roll(codes[short_hour], 1, axis=1)
+        codes[short_hour, 0] = ord("0")
+
+    digits = {column: codes[:, column].astype(np.int32) - ord("0") for column in (0, 1, 3, 4, 6, 7)}
+    is_digit = {column: (digit >= 0) & (digit <= 9) for column, digit in digits.items()}
+
+    # Minutes or seconds past 59 are malformed, not carried over
+    hours_minutes = (is_digit[0] & is_digit[1] & (codes[:, 2] == ord(":"))
+                     & is_digit[3] & (digits[3] <= 5) & is_digit[4])
+    clock = hours_minutes & (codes[:, 5] == 0)
+    seconds = hours_minutes & (codes[:, 5] == ord(":")) & is_digit[6] & (digits[6] <= 5) & is_digit[7]
+
+    minutes = ((digits[0] * 10 + digits[1]) * 60 + digits[3] * 10 + digits[4]).astype(np.float64)
+
+    if width > CLOCK_WIDTH:
+        # "HH:MM:SS." followed by nothing but digits, rows filling the width may have been truncated
+        fraction_digits = codes[:, 9:].astype(np.int32) - ord("0")
+        in_fraction = codes[:, 9:] != 0
+        seconds &= (codes[:, 8] == 0) | ((codes[:, 8] == ord(".")) & (codes[:, -1] == 0) & np.all(
+            ~in_fraction | ((fraction_digits >= 0) & (fraction_digits <= 9)), axis=1))
+        fraction = np.where(in_fraction, fraction_digits, 0) @ (10.0 ** -np.arange(1, width - 8))
+    else:
+        seconds &= codes[:, 8] == 0
+        fraction = 0.0
+
+    minutes += np.where(seconds, (digits[6] * 10 + digits[7] + fraction) / 60, 0.0)
+    minutes[~(clock | seconds)] = np.nan
+
+    return minutes
+
+
+def decode_iso_time(codes):
+    """Time of day in minutes of ISO timestamp code point rows, NaN where malformed"""
+    # Time of day as written, so the UTC offset is cut off instead of converted
+    # (parsing offsets is also what makes to_datetime slow). The offset comes
+    # after "YYYY-MM-DDTHH:MM", the earliest column it can start at.
+    tail = codes[:, 16:]
+    is_offset = (tail == ord("+")) | (tail == ord("-")) | (tail == ord("Z"))
+    cut = np.where(is_offset.any(axis=1), is_offset.argmax(axis=1), tail.shape[1]) + 16
+
+    if cut.min() == cut.max():
+        # One layout for every row (the usual case), a slice cuts the offsets
+        codes = codes[:, :cut[0]]
+    else:
+        codes = codes * (np.arange(codes.shape[1])[None, :] < cut[:, None])
+
+    local = np.ascontiguousarray(codes).view(f"U{codes.shape[1]}").ravel()
+    stamps = pd.to_datetime(local, format='ISO8601', errors='coerce').to_numpy()
+
+    return (stamps - stamps.astype("datetime64[D]")) / np.timedelta64(1, "s") / 60
+
+
+def parse_clock_strings(text):
+    """Clock strings, ISO timestamps and numeric hours -> minutes since midnight, NaN where malformed"""
+    # "H:MM", "HH:MM" and "HH:MM:SS" are decoded from the code points of fixed-width strings
+    codes = get_code_points(text, CLOCK_WIDTH)
+    minutes = decode_clock(codes)
+
+    rest = np.flatnonzero(np.isnan(minutes))
+    if not len(rest):
+        return minutes
+
+    # Strings longer than "HH:MM:SS": ISO timestamps ("YYYY-MM-DD...") and clock strings
+    # with fractional seconds, decoded again at full width
+    codes = codes[rest]
+    long = codes[:, 8] != 0
+    iso = long & (codes[:, 4] == ord("-")) & (codes[:, 7] == ord("-"))
+    for column in range(4):
+        iso &= (codes[:, column] >= ord("0")) & (codes[:, column] <= ord("9"))
+    fractional = long & ~iso
+
+    if iso.any():
+        minutes[rest[iso]] = decode_iso_time(get_code_points(text.iloc[rest[iso]], LONG_WIDTH))
+    if fractional.any():
+        minutes[rest[fractional]] = decode_clock(get_code_points(text.iloc[rest[fractional]], LONG_WIDTH))
+
+    # Numeric strings are hours ("13", "7.5")
+    numeric = rest[np.isnan(minutes[rest]) & ~iso]
+    if len(numeric):
+        minutes[numeric] = pd.to_numeric(text.iloc[numeric], errors='coerce').to_numpy(
+            dtype=np.float64, na_value=np.nan) * 60
+
+    # Surrounding whitespace, rare enough to parse the stripped strings again
+    unmatched = rest[np.isnan(minutes[rest])]
+    if len(unmatched):
+        stripped = text.iloc[unmatched].str.strip()
+        changed = (stripped.str.len() < text.iloc[unmatched].str.len()).to_numpy()
+        if changed.any():
+            minutes[unmatched[changed]] = parse_clock_strings(stripped[changed])
+
+    return minutes
+
+
+def add_total_minutes(df):
+    """Add the total_minutes column parsed from the time column (column 0)"""
+    if 'total_minutes' not in df.columns:
+        df['total_minutes'] = parse_total_minutes(df.iloc[:, 0])
+    return df
+
+
+def read_series_csv(file_path):
+    return add_total_minutes(pd.read_csv(file_path))
+
+
+# 'HH:MM' label of every minute of a day, including 24:00
+MINUTE_LABELS = np.array([f"{minute // 60:02d}:{minute % 60:02d}" for minute in range(24 * 60 + 1)], dtype=object)
+
+
+def format_minutes(minutes):
+    """Inverse of the time parsing, total minutes -> 'HH:MM' ('HH:MM:SS' for fractional minutes)"""
+    minutes = np.asarray(minutes, dtype=np.float64)
+    whole = np.all(minutes == np.round(minutes))
+
+    if whole and len(minutes) and minutes.min() >= 0 and minutes.max() < len(MINUTE_LABELS):
+        return MINUTE_LABELS[minutes.astype(np.int64)]
+
+    seconds = np.round(minutes * 60).astype(np.int64)
+    if whole:
+        return np.array([f"{second // 3600:02d}:{second // 60 % 60:02d}" for second in seconds], dtype=object)
+    return np.array([f"{second // 3600:02d}:{second // 60 % 60:02d}:{second % 60:02d}" for second in seconds],
+                    dtype=object)
+
+
+def to_total_minutes(minutes):
+    """Stored float64 minutes back to the dtype parse_total_minutes gives"""
+    minutes = np.asarray(minutes, dtype=np.float64)
+    if np.all(minutes == np.round(minutes)):
+        return minutes.astype(np.int64)
+    return minutes
+
+
+def get_csv_paths(folder_path):
+    return [os.path.join(folder_path, filename) for filename in SERIES_FILENAMES]
+
+
+def pack_series(dataframes):
+    """(price, solar, wind, consumption) DataFrames -> (series header, float64 payload)"""
+    series_header = []
+    payload = []
+    offset = 0
+
+    for name, df in zip(SERIES_NAMES, dataframes):
+        df = add_total_minutes(df.copy())
+        minutes = df['total_minutes'].to_numpy(dtype=np.float64)
+        values = pd.to_numeric(df.iloc[:, 1], errors='coerce').to_numpy(dtype=np.float64)
+
+        series_header.append({
+            "name": name,
+            "columns": [str(df.columns[0]), str(df.columns[1])],
+            "length": len(df),
+            "offset": offset,
+        })
+        payload.extend((minutes, values))
+        offset += 2 * len(df)
+
+    return series_header, np.concatenate(payload).astype("<f8")
+
+
+def unpack_series(data, series_header):
+    """Inverse of pack_series, builds the DataFrames over a (memory mapped) payload"""
+    series_by_name = {series["name"]: series for series in series_header}
+    dataframes = []
+
+    for name in SERIES_NAMES:
+        series = series_by_name[name]
+        start, length = series["offset"], series["length"]
+        minutes = data[start:start + length]
+        values = data[start + length:start + 2 * length]
+
+        time_col, value_col = series["columns"]
+        dataframes.append(pd.DataFrame({
+            time_col: format_minutes(minutes),
+            value_col: values,
+            'total_minutes': to_total_minutes(minutes),
+        }))
+
+    return tuple(dataframes)
+
+
+def atomic_write(path, data):
+    """Write bytes (or str as UTF-8) to path through a temporary file in the same directory
+
+    Readers see either the old file or the complete new one, never a half-written file.
+    """
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def write_sidecar(folder_path, dataframes):
+    """Write the (price, solar, wind, consumption) DataFrames of a date folder to its sidecar"""
+    series_header, payload = pack_series(dataframes)
+    header = {"version": SIDECAR_VERSION, "series": series_header}
+
+    header_bytes = json.dumps(header, ensure_ascii=False).encode("utf-8")
+    prefix_length = len(SIDECAR_MAGIC) + 4 + len(header_bytes)
+    padding = b"\0" * (-prefix_length % 8)
+
+    atomic_write(os.path.join(folder_path, SIDECAR_FILENAME), b"".join(
+        (SIDECAR_MAGIC, struct.pack("<I", len(header_bytes)), header_bytes, padding, payload.tobytes())))
+
+    return True
+
+
+def write_date_folder(datafiles_dir, date, dataframes):
+    """Write the four CSVs and the sidecar of a date, renamed into place once complete"""
+    folder_path = os.path.join(datafiles_dir, date)
+    os.makedirs(datafiles_dir, exist_ok=True)
+
+    tmp_path = tempfile.mkdtemp(dir=datafiles_dir, prefix=f".{date}-")
+    try:
+        for csv_path, df in zip(get_csv_paths(tmp_path), dataframes):
+            df.to_csv(csv_path, index=False)
+        write_sidecar(tmp_path, dataframes)
+
+        os.chmod(tmp_path, 0o755)
+        if os.path.isdir(folder_path):
+            shutil.rmtree(folder_path)
+        os.replace(tmp_path, folder_path)
+    except BaseException:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        raise
+
+    return folder_path
+
+
+def read_sidecar(folder_path):
+    """Memory map the sidecar of a date folder, returns the four DataFrames or None"""
+    sidecar_path = os.path.join(folder_path, SIDECAR_FILENAME)
+
+    try:
+        with open(sidecar_path, "rb") as f:
+            if f.read(len(SIDECAR_MAGIC)) != SIDECAR_MAGIC:
+                return None
+            header_length, = struct.unpack("<I", f.read(4))
+            header = json.loads(f.read(header_length).decode("utf-8"))
+    except (OSError, ValueError, struct.error):
+        return None
+
+    if header.get("version") != SIDECAR_VERSION:
+        return None
+
+    data_offset = len(SIDECAR_MAGIC) + 4 + header_length
+    data_offset += -data_offset % 8
+    payload_length = sum(2 * series["length"] for series in header["series"])
+
+    if payload_length > 0:
+        data = np.memmap(sidecar_path, dtype="<f8", mode="r", offset=data_offset, shape=(payload_length,))
+    else:
+        data = np.empty(0)
+
+    return unpack_series(data, header["series"])
+
+
+def read_folder(folder_path):
+    """The four DataFrames of a date folder, from its sidecar when fresh, else from its CSVs"""
+    dataframes = read_sidecar(folder_path) if sidecar_is_fresh(folder_path) else None
+    if dataframes is None:
+        dataframes = tuple(read_series_csv(csv_path) for csv_path in get_csv_paths(folder_path))
+    return dataframes
+
+
+def sidecar_is_fresh(folder_path):
+    """True when the sidecar exists and is not older than any of the CSVs"""
+    try:
+        sidecar_mtime = os.stat(os.path.join(folder_path, SIDECAR_FILENAME)).st_mtime_ns
+    except OSError:
+        return False
+
+    for csv_path in get_csv_paths(folder_path):
+        try:
+            if os.stat(csv_path).st_mtime_ns > sidecar_mtime:
+                return False
+        except OSError:
+            continue
+
+    return True
+
+
+def convert_folder(folder_path):
+    """Write the sidecar of one date folder from its CSVs"""
+    csv_paths = get_csv_paths(folder_path)
+    if not all(os.path.isfile(csv_path) for csv_path in csv_paths):
+        return False
+
+    return write_sidecar(folder_path, [read_series_csv(csv_path) for csv_path in csv_paths])
+
+
+def convert_datafiles(datafiles_dir, overwrite=False):
+    """One-shot migration: write the sidecar of every date folder missing an up-to-date one"""
+    converted, skipped, failed = [], [], []
+
+    for date in sorted(os.listdir(datafiles_dir)):
+        folder_path = os.path.join(datafiles_dir, date)
+        # Hidden folders are dates still being downloaded
+        if not os.path.isdir(folder_path) or date.startswith("."):
+            continue
+
+        # Not a date folder (e.g. the consolidated store)
+        if not any(os.path.isfile(csv_path) for csv_path in get_csv_paths(folder_path)):
+            continue
+
+        if not overwrite and sidecar_is_fresh(folder_path):
+            skipped.append(date)
+            continue
+
+        try:
+            if convert_folder(folder_path):
+                converted.append(date)
+            else:
+                failed.append(date)
+        except (OSError, ValueError) as e:
+            print(f"Failed to convert {folder_path}: {e}")
+            failed.append(date)
+
+    return converted, skipped, failed
+
+
+if __name__ == "__main__":
+    datafiles_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "datafiles")
+
+    converted, skipped, failed = convert_datafiles(datafiles_dir)
+    print(f"Converted: {len(converted)}, up to date: {len(skipped)}, failed: {len(failed)}")
+    for date in failed:
+        print(f"  - {date}")
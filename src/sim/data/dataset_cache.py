@@ -0,0 +1,107 @@
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+from dotenv import load_dotenv
+
+load_dotenv()
+
+CACHE_MAX_ENTRIES = int(os.getenv("DATASET_CACHE_ENTRIES", "32"))
+CACHE_MAX_MB = float(os.getenv("DATASET_CACHE_MB", "256"))
+
+
+class DatasetCache:
+    """Process-wide LRU cache of parsed per-date datasets.
+
+    Entries are keyed by (datafiles folder, date) and remember the mtimes of
+    the files they were parsed from; a changed file on disk is a miss and
+    replaces the entry. Cached datasets are shared between DataManager
+    instances and must be treated as read-only.
+    """
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, max_bytes=int(CACHE_MAX_MB * 1024 * 1024)):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_load(self, key, file_paths, loader):
+        """Return the cached dataset for key, calling loader(file_paths) on a miss"""
+        signature = self.get_signature(file_paths)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == signature:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        # Parse outside the lock so other dates are not blocked behind it
+        dataset = loader(file_paths)
+        self.put(key, signature, dataset)
+
+        return dataset
+
+    def put(self, key, signature, dataset):
+        nbytes = self.estimate_nbytes(dataset)
+
+        with self._lock:
+            if key in self._entries:
+                self.current_bytes -= self._entries.pop(key)[2]
+
+            if nbytes > self.max_bytes:
+                return
+
+            self._entries[key] = (signature, dataset, nbytes)
+            self.current_bytes += nbytes
+
+            while len(self._entries) > self.max_entries or self.current_bytes > self.max_bytes:
+                _, (_, _, evicted_bytes) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_bytes
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    @staticmethod
+    def get_signature(file_paths):
+        signature = []
+        for file_path in file_paths:
+            try:
+                signature.append(os.stat(file_path).st_mtime_ns)
+            except OSError:
+                signature.append(None)
+        return tuple(signature)
+
+    @staticmethod
+    def estimate_nbytes(dataset):
+        nbytes = 0
+        for item in dataset:
+            if isinstance(item, pd.DataFrame):
+                nbytes += int(item.memory_usage(deep=True).sum())
+            else:
+                nbytes += int(getattr(item, "nbytes", 0))
+        return nbytes
+
+
+dataset_cache = DatasetCache()
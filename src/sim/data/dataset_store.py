@@ -0,0 +1,225 @@
+import os
+import json
+import threading
+from datetime import date as date_type, timedelta
+
+import numpy as np
+
+try:
+    from .datafile_io import pack_series, unpack_series, read_folder, get_csv_paths, atomic_write
+except ImportError:
+    from datafile_io import pack_series, unpack_series, read_folder, get_csv_paths, atomic_write
+
+'''
+Consolidated store of every date, one pair of files per year:
+    - <year>.bin: append-only float64 payload, each date packed as in the sidecar
+    - <year>.json: index date -> offset of its payload and its series header
+The year payloads are memory mapped, reading a date never opens a date folder.
+Appends from several threads are serialized, several processes must not
+append to the same store at once.
+'''
+STORE_VERSION = 1
+
+
+class DatasetStore:
+
+    def __init__(self, store_dir):
+        self.store_dir = store_dir
+
+        self._indexes = {}
+        self._index_mtimes = {}
+        self._maps = {}
+        self._lock = threading.RLock()
+
+    def get_data_path(self, year):
+        return os.path.join(self.store_dir, f"{year}.bin")
+
+    def get_index_path(self, year):
+        return os.path.join(self.store_dir, f"{year}.json")
+
+    def get_years(self):
+        if not os.path.isdir(self.store_dir):
+            return []
+        return sorted(filename[:-5] for filename in os.listdir(self.store_dir) if filename.endswith(".json"))
+
+    def load_index(self, year, reload=False):
+        """Date index of one year, re-read from disk only when asked and changed"""
+        with self._lock:
+            if year in self._indexes and not reload:
+                return self._indexes[year]
+
+            index_path = self.get_index_path(year)
+            try:
+                mtime = os.stat(index_path).st_mtime_ns
+            except OSError:
+                self._indexes[year] = {}
+                self._index_mtimes[year] = None
+                return self._indexes[year]
+
+            if year not in self._indexes or self._index_mtimes.get(year) != mtime:
+                with open(index_path, "r", encoding="utf-8") as f:
+                    index = json.load(f)
+                self._indexes[year] = index.get("dates", {}) if index.get("version") == STORE_VERSION else {}
+                self._index_mtimes[year] = mtime
+
+            return self._indexes[year]
+
+    def has_date(self, date: str):
+        year = date[:4]
+        if date in self.load_index(year):
+            return True
+        # Pick up dates appended by other processes before reporting a miss
+        return date in self.load_index(year, reload=True)
+
+    def is_current(self, date: str, folder_path):
+        """True when the date is stored and no CSV of its date folder was written after it"""
+        if not self.has_date(date):
+            return False
+
+        # Entries of older stores have no write time, their folder wins when it exists
+        written_ns = self.load_index(date[:4])[date].get("mtime_ns", 0)
+        csv_mtimes = [os.stat(csv_path).st_mtime_ns for csv_path in get_csv_paths(folder_path)
+                      if os.path.isfile(csv_path)]
+
+        # Same tick is ambiguous, the folder is read then
+        return not csv_mtimes or max(csv_mtimes) < written_ns
+
+    def get_signature_path(self, date: str):
+        """File whose mtime changes whenever the data of this date can change"""
+        return self.get_index_path(date[:4])
+
+    def get_payload(self, year, offset, length):
+        with self._lock:
+            data = self._maps.get(year)
+            if data is None or len(data) < offset + length:
+                # The year file only grows, remap it to cover the appended dates
+                size = os.path.getsize(self.get_data_path(year)) // 8
+                data = np.memmap(self.get_data_path(year), dtype="<f8", mode="r", shape=(size,))
+                self._maps[year] = data
+        return data[offset:offset + length]
+
+    def read_date(self, date: str):
+        """The (price, solar, wind, consumption) DataFrames of a date, or None if not stored"""
+        year = date[:4]
+        entry = self.load_index(year).get(date)
+        if entry is None:
+            if not self.has_date(date):
+                return None
+            entry = self.load_index(year)[date]
+
+        return unpack_series(self.get_payload(year, entry["offset"], entry["length"]), entry["series"])
+
+    def read_range(self, start_date: str, end_date: str):
+        """Every stored date between start_date and end_date (inclusive) -> its DataFrames"""
+        result = {}
+        for date in self.get_dates():
+            if start_date <= date <= end_date:
+                result[date] = self.read_date(date)
+        return result
+
+    def is_stored(self, year, entry, series_header, payload):
+        """True when an index entry already holds exactly this payload"""
+        if entry is None or entry["length"] != len(payload):
+            return False
+        # The stored header went through JSON, compare both in that form
+        if json.dumps(entry["series"]) != json.dumps(series_header):
+            return False
+        return self.get_payload(year, entry["offset"], entry["length"]).tobytes() == payload.tobytes()
+
+    def append(self, date: str, dataframes):
+        """Append the data of a date, replacing the index entry of an already stored one
+
+        Unchanged data is not appended again, only its write time is refreshed, so downloading
+        the same date over and over does not grow the year file.
+        """
+        series_header, payload = pack_series(dataframes)
+        year = date[:4]
+
+        with self._lock:
+            os.makedirs(self.store_dir, exist_ok=True)
+            index = dict(self.load_index(year, reload=True))
+
+            if self.is_stored(year, index.get(date), series_header, payload):
+                os.utime(self.get_data_path(year))
+                index[date] = dict(index[date], mtime_ns=os.stat(self.get_data_path(year)).st_mtime_ns)
+                self.write_index(year, index)
+                return True
+
+            with open(self.get_data_path(year), "ab") as f:
+                offset = f.tell() // 8
+                f.write(payload.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+                # Filesystem time of the write, compared with the mtimes of the date folder
+                written_ns = os.fstat(f.fileno()).st_mtime_ns
+
+            index[date] = {"offset": offset, "length": len(payload), "series": series_header,
+                           "mtime_ns": written_ns}
+            self.write_index(year, index)
+
+        return True
+
+    def write_index(self, year, index):
+        atomic_write(self.get_index_path(year), json.dumps({"version": STORE_VERSION, "dates": index},
+                                                           ensure_ascii=False))
+
+        self._indexes[year] = index
+        self._index_mtimes[year] = os.stat(self.get_index_path(year)).st_mtime_ns
+
+    def get_dates(self):
+        dates = []
+        for year in self.get_years():
+            dates.extend(self.load_index(year, reload=True).keys())
+        return sorted(dates)
+
+    def manifest(self):
+        """Which dates are stored, per year, and which are missing inside the stored span"""
+        dates = self.get_dates()
+        manifest = {"dates": dates, "years": {}, "missing": []}
+
+        for date in dates:
+            manifest["years"][date[:4]] = manifest["years"].get(date[:4], 0) + 1
+
+        if dates:
+            stored = set(dates)
+            day = date_type.fromisoformat(dates[0])
+            last_day = date_type.fromisoformat(dates[-1])
+            while day <= last_day:
+                if day.isoformat() not in stored:
+                    manifest["missing"].append(day.isoformat())
+                day += timedelta(days=1)
+
+        return manifest
+
+    def import_datafiles(self, datafiles_dir, overwrite=False):
+        """Append every complete date folder not yet in the store"""
+        imported = []
+        for date in sorted(os.listdir(datafiles_dir)):
+            folder_path = os.path.join(datafiles_dir, date)
+            # Hidden folders are dates still being downloaded
+            if not os.path.isdir(folder_path) or folder_path == self.store_dir or date.startswith("."):
+                continue
+            if not all(os.path.isfile(csv_path) for csv_path in get_csv_paths(folder_path)):
+                continue
+            if not overwrite and self.has_date(date):
+                continue
+
+            self.append(date, read_folder(folder_path))
+            imported.append(date)
+
+        return imported
+
+
+datafiles_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "datafiles")
+dataset_store = DatasetStore(os.path.join(datafiles_dir, "store"))
+
+
+if __name__ == "__main__":
+    imported = dataset_store.import_datafiles(datafiles_dir)
+    print(f"Imported {len(imported)} date folder(s) into {dataset_store.store_dir}")
+
+    manifest = dataset_store.manifest()
+    for year, count in manifest["years"].items():
+        print(f"  - {year}: {count} date(s)")
+    if manifest["missing"]:
+        print(f"Missing dates inside the stored span: {len(manifest['missing'])}")
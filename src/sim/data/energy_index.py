@@ -0,0 +1,152 @@
+import numpy as np
+
+MINUTES_PER_DAY = 1440
+
+# Column order of the store, same order get_model_data_entry returns its values in
+SERIES_NAMES = ("price", "solar", "wind", "consumption")
+
+
+class EnergyIndex:
+    """Columnar prefix-sum store of the price, solar, wind and consumption series.
+
+    Every series is placed on one shared time axis (the union of all sample
+    minutes), so the mean of the samples inside a (last, new] window is
+    answered for the four series with a single pair of binary searches.
+    """
+
+    def __init__(self, series):
+        """series: one (minutes, values) pair per entry of SERIES_NAMES"""
+        series = [(np.asarray(minutes, dtype=np.float64), np.asarray(values, dtype=np.float64))
+                  for minutes, values in series]
+
+        self.minutes = np.unique(np.concatenate([minutes for minutes, _ in series]))
+
+        n_points, n_series = len(self.minutes), len(series)
+        rows = np.zeros((n_points, n_series))
+        sums = np.zeros((n_points, n_series))
+        valid_rows = np.zeros((n_points, n_series))
+
+        for col, (minutes, values) in enumerate(series):
+            positions = np.searchsorted(self.minutes, minutes)
+            # NaN samples count as rows but not towards the mean (same as pandas .mean())
+            valid = ~np.isnan(values)
+
+            rows[:, col] = np.bincount(positions, minlength=n_points)
+            sums[:, col] = np.bincount(positions, weights=np.where(valid, values, 0.0), minlength=n_points)
+            valid_rows[:, col] = np.bincount(positions, weights=valid, minlength=n_points)
+
+        zeros = np.zeros((1, n_series))
+        self.cum_rows = np.concatenate((zeros, np.cumsum(rows, axis=0)))
+        self.cum_values = np.concatenate((zeros, np.cumsum(sums, axis=0)))
+        self.cum_valid = np.concatenate((zeros, np.cumsum(valid_rows, axis=0)))
+
+        # Interpolant of each series on its own sample minutes, for windows without samples
+        self.edge_minutes = []
+        self.edge_values = []
+        for minutes, values in series:
+            edge_minutes, edge_values = self.build_interpolant(minutes, values)
+            self.edge_minutes.append(edge_minutes)
+            self.edge_values.append(edge_values)
+
+    @staticmethod
+    def build_interpolant(minutes, values):
+        """Sorted unique sample minutes and their values with NaN gaps linearly filled.
+
+        Same as reindexing the series on its sorted unique minutes followed by
+        .interpolate(method='linear'): gaps are filled by position, leading
+        NaNs stay NaN and trailing NaNs take the last valid value. Samples
+        sharing a minute are averaged.
+        """
+        unique_minutes, positions = np.unique(minutes, return_inverse=True)
+        valid = ~np.isnan(values)
+
+        counts = np.bincount(positions, weights=valid, minlength=len(unique_minutes))
+        sums = np.bincount(positions, weights=np.where(valid, values, 0.0), minlength=len(unique_minutes))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            unique_values = np.where(counts > 0, sums / counts, np.nan)
+
+        valid = ~np.isnan(unique_values)
+        if valid.any() and not valid.all():
+            steps = np.arange(len(unique_values))
+            filled = np.interp(steps, steps[valid], unique_values[valid])
+            filled[:np.argmax(valid)] = np.nan
+            unique_values = filled
+
+        return unique_minutes, unique_values
+
+    @property
+    def nbytes(self):
+        return (self.minutes.nbytes + self.cum_rows.nbytes + self.cum_values.nbytes + self.cum_valid.nbytes
+                + sum(array.nbytes for array in self.edge_minutes + self.edge_values))
+
+    @classmethod
+    def from_dataframes(cls, df_price, df_solar, df_wind, df_consumption):
+        """Build the store from DataFrames holding a 'total_minutes' column and the values in column 1"""
+        return cls([(df['total_minutes'], df.iloc[:, 1])
+                    for df in (df_price, df_solar, df_wind, df_consumption)])
+
+    def window_sum(self, start, end):
+        """Return (rows, sum, valid_rows) per series of the samples with start < minute <= end"""
+        lo = np.searchsorted(self.minutes, start, side="right")
+        hi = np.searchsorted(self.minutes, end, side="right")
+
+        return (self.cum_rows[hi] - self.cum_rows[lo],
+                self.cum_values[hi] - self.cum_values[lo],
+                self.cum_valid[hi] - self.cum_valid[lo])
+
+    def window_means(self, last_total_minutes, new_total_minutes):
+        """Mean of each series over (last, new], wrapping past midnight.
+
+        Accepts scalars or equally shaped arrays of window bounds; array input
+        returns one row per window. Returns (means, empty): series without
+        any sample in a window have empty set to True and a NaN mean.
+        """
+        last_total_minutes = np.asarray(last_total_minutes, dtype=np.float64)
+        new_total_minutes = np.asarray(new_total_minutes, dtype=np.float64)
+
+        # Windows ending after midnight are split into (last, 1440] and (0, new - 1440],
+        # the second part is the empty (0, 0] window for the others
+        rows, total, valid = self.window_sum(last_total_minutes, np.minimum(new_total_minutes, MINUTES_PER_DAY))
+        rows2, total2, valid2 = self.window_sum(0.0, np.maximum(new_total_minutes - MINUTES_PER_DAY, 0.0))
+        rows, total, valid = rows + rows2, total + total2, valid + valid2
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means = np.where(valid > 0, total / valid, np.nan)
+
+        return means, rows == 0
+
+    def edge_means(self, col, last_total_minutes, new_total_minutes):
+        """Average of the values of one series nearest to both edges of the window.
+
+        The edges are clamped to the sampled range first; equidistant samples
+        resolve to the later one, as reindex(method='nearest') does.
+        """
+        minutes, values = self.edge_minutes[col], self.edge_values[col]
+
+        start_value = values[self.nearest(minutes, np.clip(last_total_minutes, minutes[0], minutes[-1]))]
+        end_value = values[self.nearest(minutes, np.clip(np.mod(new_total_minutes, MINUTES_PER_DAY),
+                                                         minutes[0], minutes[-1]))]
+
+        return (start_value + end_value) / 2
+
+    @staticmethod
+    def nearest(minutes, targets):
+        right = np.minimum(np.searchsorted(minutes, targets, side="left"), len(minutes) - 1)
+        left = np.maximum(right - 1, 0)
+
+        return np.where(targets - minutes[left] < minutes[right] - targets, left, right)
+
+    def interval_means(self, last_total_minutes, new_total_minutes):
+        """window_means with the empty windows filled from the edge interpolant"""
+        means, empty = self.window_means(last_total_minutes, new_total_minutes)
+
+        if empty.any():
+            last_total_minutes = np.asarray(last_total_minutes, dtype=np.float64)
+            new_total_minutes = np.asarray(new_total_minutes, dtype=np.float64)
+
+            for col in np.flatnonzero(empty.any(axis=tuple(range(empty.ndim - 1)))):
+                rows = empty[..., col]
+                means[..., col] = np.where(rows, self.edge_means(col, last_total_minutes, new_total_minutes),
+                                           means[..., col])
+
+        return means
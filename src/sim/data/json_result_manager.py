@@ -1,47 +1,33 @@
 import json
 import os
 from datetime import datetime
-from sim.data.data_manager import data_manager
+from sim.agent.actions import FLOW_KEYS, flows_to_actions
+
+INPUT_COLUMNS = ("Solar_Production", "Wind_Production", "Consumption", "Current_Capacity", "Price")
+OUTPUT_COLUMNS = ("Balance", "New_Capacity")
 
 class JsonResultManager:
     results_path = os.path.join(os.path.dirname(__file__), "results")
-    final_json_data = {}
-    final_json_filename = f"final_results_{datetime.now():%Y%m%d_%H%M%S}.json"
-    final_json_filepath = os.path.join(results_path, "final_results", final_json_filename)
 
-    def parse_actions(self, action_string):
-        if action_string == "No actions" or not action_string:
-            return []
-        
-        actions = []
-        action_pairs = action_string.split(", ")
-        
-        for pair in action_pairs:
-            key, value = pair.split(": ")
-            actions.append({
-                key.strip(): float(value.strip())
-            })
-        
-        return actions
+    def __init__(self, data_manager):
+        # Results of one run, kept per instance so concurrent runs never mix
+        self.data_manager = data_manager
+        self.final_json_data = {}
 
     def dataframe_to_json(self, results_df):
+        """{"HH:MM": {input_data, Actions, output_data}} of a results frame, Actions lists only the non-zero flows"""
         json_res = {}
 
-        for index, row in results_df.iterrows():
-            time_key = row["Current_Hour"]
+        hours = results_df["Current_Hour"].tolist()
+        inputs = results_df[list(INPUT_COLUMNS)].to_numpy(dtype=float).tolist()
+        flows = results_df[list(FLOW_KEYS)].to_numpy(dtype=float)
+        outputs = results_df[list(OUTPUT_COLUMNS)].to_numpy(dtype=float).tolist()
+
+        for time_key, input_row, flow_row, output_row in zip(hours, inputs, flows, outputs):
             json_res[time_key] = {
-                "input_data" : {
-                    "Solar_Production": row["Solar_Production"],
-                    "Wind_Production": row["Wind_Production"],
-                    "Consumption": row["Consumption"],
-                    "Current_Capacity": row["Current_Capacity"],
-                    "Price": row["Price"]
-                },
-                "Actions": self.parse_actions(row["Actions"]),
-                "output_data": {
-                    "Balance": row["Balance"],
-                    "New_Capacity": row["New_Capacity"]
-                }
+                "input_data": dict(zip(INPUT_COLUMNS, input_row)),
+                "Actions": flows_to_actions(flow_row),
+                "output_data": dict(zip(OUTPUT_COLUMNS, output_row))
             }
 
         self.final_json_data[self.agent_type] = json_res
@@ -51,10 +37,13 @@ class JsonResultManager:
     def save_to_json_file(self, results_df, agent_type="smart"):
         self.agent_type = agent_type
 
-        filename_json = f"{agent_type}_{datetime.now():%Y%m%d_%H%M%S}.json"
+        # Microseconds keep the files of runs finishing in the same second apart
+        timestamp = f"{datetime.now():%Y%m%d_%H%M%S_%f}"
+
+        filename_json = f"{agent_type}_{timestamp}.json"
         filepath_json = os.path.join(self.results_path, "json", agent_type, filename_json)
 
-        filename_csv = f"{agent_type}_{datetime.now():%Y%m%d_%H%M%S}.csv"
+        filename_csv = f"{agent_type}_{timestamp}.csv"
         filepath_csv = os.path.join(self.results_path, "csv", agent_type, filename_csv)
         
         # Create directories if they don't exist
@@ -70,7 +59,7 @@ class JsonResultManager:
         return True
     
     def calculate_final_results(self):
-        if self.final_json_data["smart"] and self.final_json_data["basic"]:
+        if self.final_json_data.get("smart") and self.final_json_data.get("basic"):
             res = {}
             smart_last_key = list(self.final_json_data["smart"].keys())[-1]
             basic_last_key = list(self.final_json_data["basic"].keys())[-1]
@@ -82,21 +71,32 @@ class JsonResultManager:
             res["basic_agent_balance"] = basic_balance
             res["agent_balance_difference"] = smart_balance - basic_balance
 
-            flag, total_consumption_cust = data_manager.calculate_total_consumption_price()
+            oracle_balance = None
+            if self.final_json_data.get("oracle"):
+                oracle_last_key = list(self.final_json_data["oracle"].keys())[-1]
+                oracle_balance = self.final_json_data["oracle"][oracle_last_key]["output_data"]["Balance"]
+
+                # Perfect foresight bound, how much each agent leaves on the table
+                res["oracle_agent_balance"] = oracle_balance
+                res["smart_agent_oracle_gap"] = oracle_balance - smart_balance
+                res["basic_agent_oracle_gap"] = oracle_balance - basic_balance
+
+            flag, total_consumption_cust = self.data_manager.calculate_total_consumption_price()
             if flag:
                 res["total_consumption_cust"] = 0 - total_consumption_cust
                 res["basic_agent_consumption_saving"] = abs(basic_balance - (0 -total_consumption_cust))
                 res["smart_agent_consumption_saving"] = abs(smart_balance - (0 -total_consumption_cust))
+                if oracle_balance is not None:
+                    res["oracle_agent_consumption_saving"] = abs(oracle_balance - (0 - total_consumption_cust))
 
             self.final_json_data["final_results"] = res
 
-            os.makedirs(os.path.dirname(self.final_json_filepath), exist_ok=True)
+            final_json_filename = f"final_results_{datetime.now():%Y%m%d_%H%M%S_%f}.json"
+            final_json_filepath = os.path.join(self.results_path, "final_results", final_json_filename)
+            os.makedirs(os.path.dirname(final_json_filepath), exist_ok=True)
 
-            with open(self.final_json_filepath, 'w', encoding='utf-8') as f:
+            with open(final_json_filepath, 'w', encoding='utf-8') as f:
                 json.dump(self.final_json_data, f, indent=4, ensure_ascii=False)
 
             return True
         return False
-
-
-json_result_manager = JsonResultManager()
@@ -0,0 +1,228 @@
+import os
+import json
+import time
+import random
+import hashlib
+import tempfile
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+import requests
+from dotenv import load_dotenv
+
+try:
+    from .api_manager import APIManager
+    from .datafile_io import atomic_write
+    from .dataset_store import DatasetStore
+    from .response_cache import ResponseCache
+except ImportError:
+    from api_manager import APIManager
+    from datafile_io import atomic_write
+    from dataset_store import DatasetStore
+    from response_cache import ResponseCache
+
+'''
+Local stand-in for the REN datahub, for CI and machines without internet access.
+    - replay: serves the captured fixtures, 404 for anything else
+    - record: like replay, but a missing fixture is fetched upstream and captured first
+Fixtures live in <fixtures_dir>/<endpoint>/<date>.json, one raw response each.
+Load mode (latency, failure_rate) delays every request and answers a share of
+them with 503, to exercise the retries and tune the concurrent prefetch.
+Point the simulator at it with REN_API_BASE_URL=<server.url>.
+'''
+load_dotenv()
+
+ENDPOINTS = ("ElectricityMarketPricesDaily", "ElectricityProductionBreakdownDaily")
+
+STUB_FIXTURES_DIR = os.getenv("REN_STUB_FIXTURES",
+                              os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "ren"))
+
+
+class RENStubServer:
+
+    def __init__(self, fixtures_dir=STUB_FIXTURES_DIR, mode="replay", host="127.0.0.1", port=0,
+                 latency=0.0, jitter=0.0, failure_rate=0.0, seed=None, upstream=APIManager.BASE_URL):
+        if mode not in ("replay", "record"):
+            raise ValueError(f"Unknown stub server mode: {mode}")
+
+        self.fixtures_dir = fixtures_dir
+        self.mode = mode
+        self.upstream = upstream.rstrip("/")
+
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self._random = random.Random(seed)
+
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "served": 0, "not_modified": 0, "recorded": 0,
+                      "missing": 0, "injected_failures": 0}
+
+        self.httpd = ThreadingHTTPServer((host, port), self.make_handler())
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/datahubapi"
+
+    def get_fixture_path(self, endpoint: str, date: str):
+        return os.path.join(self.fixtures_dir, endpoint, f"{date}.json")
+
+    def load_fixture(self, endpoint: str, date: str):
+        try:
+            with open(self.get_fixture_path(endpoint, date), "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def save_fixture(self, endpoint: str, date: str, body: bytes):
+        atomic_write(self.get_fixture_path(endpoint, date), body)
+
+    def record_fixture(self, endpoint: str, params: dict):
+        response = requests.get(f"{self.upstream}/electricity/{endpoint}", params=params, timeout=30)
+        response.raise_for_status()
+        response.json()
+
+        self.save_fixture(endpoint, params["date"], response.content)
+        return response.content
+
+    def import_response_cache(self, cache_dir):
+        """Turn the raw responses cached by APIManager into fixtures"""
+        imported = 0
+        for entry in ResponseCache(cache_dir, 0).entries():
+            endpoint = entry["endpoint"].rsplit("/", 1)[-1]
+            date = entry.get("params", {}).get("date")
+            if endpoint in ENDPOINTS and date:
+                self.save_fixture(endpoint, date, json.dumps(entry["body"], ensure_ascii=False).encode("utf-8"))
+                imported += 1
+        return imported
+
+    def count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    def draw_delay_and_failure(self):
+        with self._lock:
+            delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter > 0 else 0.0)
+            fail = self.failure_rate > 0 and self._random.random() < self.failure_rate
+        return delay, fail
+
+    def make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                server.count("requests")
+
+                url = urlparse(self.path)
+                endpoint = url.path.rstrip("/").rsplit("/", 1)[-1]
+                params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+
+                delay, fail = server.draw_delay_and_failure()
+                if delay > 0:
+                    time.sleep(delay)
+                if fail:
+                    server.count("injected_failures")
+                    return self.send_body(503, b'{"error": "injected failure"}')
+
+                if endpoint not in ENDPOINTS or "date" not in params:
+                    return self.send_body(404, b'{"error": "unknown endpoint"}')
+
+                body = server.load_fixture(endpoint, params["date"])
+                if body is None and server.mode == "record":
+                    try:
+                        body = server.record_fixture(endpoint, params)
+                        server.count("recorded")
+                    except (requests.exceptions.RequestException, ValueError) as e:
+                        return self.send_body(502, json.dumps({"error": str(e)}).encode("utf-8"))
+
+                if body is None:
+                    server.count("missing")
+                    return self.send_body(404, b'{"error": "no fixture"}')
+
+                etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+                if self.headers.get("If-None-Match") == etag:
+                    server.count("not_modified")
+                    return self.send_body(304, None, etag)
+
+                server.count("served")
+                return self.send_body(200, body, etag)
+
+            def send_body(self, status, body, etag=None):
+                self.send_response(status)
+                if etag is not None:
+                    self.send_header("ETag", etag)
+                if body is not None:
+                    self.send_header("Content-Type", "application/json; charset=utf-8")
+                    self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if body is not None:
+                    self.wfile.write(body)
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def benchmark_prefetch(server, start_date: str, end_date: str, concurrency_levels=(1, 2, 4, 8, 16), rate_limit=0):
+    """Time APIManager.prefetch_range against a running stub at each concurrency level.
+
+    Every level downloads into its own temporary datafiles folder and store,
+    the real datafiles are never touched.
+    """
+    results = []
+    for concurrency in concurrency_levels:
+        with tempfile.TemporaryDirectory() as datafiles_dir:
+            manager = APIManager(base_url=server.url, concurrency=concurrency, rate_limit=rate_limit,
+                                 backoff=0.05, datafiles_dir=datafiles_dir,
+                                 store=DatasetStore(os.path.join(datafiles_dir, "store")))
+
+            start = time.perf_counter()
+            result = manager.prefetch_range(start_date, end_date, concurrency=concurrency)
+            elapsed = time.perf_counter() - start
+
+        results.append({"concurrency": concurrency, "seconds": elapsed,
+                        "done": len(result["done"]), "failed": len(result["failed"])})
+    return results
+
+
+if __name__ == "__main__":
+    server = RENStubServer(
+        mode=os.getenv("REN_STUB_MODE", "replay"),
+        port=int(os.getenv("REN_STUB_PORT", "8765")),
+        latency=float(os.getenv("REN_STUB_LATENCY", "0")),
+        jitter=float(os.getenv("REN_STUB_JITTER", "0")),
+        failure_rate=float(os.getenv("REN_STUB_FAILURE_RATE", "0")),
+    )
+
+    print(f"REN stub server ({server.mode}) on {server.url}, fixtures in {server.fixtures_dir}")
+    print(f"Use it with REN_API_BASE_URL={server.url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+        print(server.stats)
@@ -0,0 +1,71 @@
+import os
+import json
+import time
+import hashlib
+
+try:
+    from .datafile_io import atomic_write
+except ImportError:
+    from datafile_io import atomic_write
+
+'''
+On-disk cache of raw REN API responses, one JSON file per request:
+    <sha256 of endpoint + params>.json -> endpoint, params, fetch time, validators, body
+Derived CSVs can be rebuilt from it at any time without touching the network.
+'''
+
+
+class ResponseCache:
+
+    def __init__(self, cache_dir, ttl):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+
+    @staticmethod
+    def get_key(endpoint: str, params: dict):
+        payload = json.dumps({"endpoint": endpoint, "params": params}, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, endpoint: str, params: dict):
+        """The cached entry of a request, or None"""
+        try:
+            with open(self.get_path(self.get_key(endpoint, params)), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def is_fresh(self, entry):
+        return entry is not None and time.time() - entry["fetched_at"] < self.ttl
+
+    def put(self, endpoint: str, params: dict, body, etag=None, last_modified=None):
+        entry = {
+            "endpoint": endpoint,
+            "params": params,
+            "fetched_at": time.time(),
+            "etag": etag,
+            "last_modified": last_modified,
+            "body": body,
+        }
+
+        atomic_write(self.get_path(self.get_key(endpoint, params)), json.dumps(entry, ensure_ascii=False))
+
+        return entry
+
+    def touch(self, entry):
+        """Mark a revalidated (304 Not Modified) entry as fetched now"""
+        return self.put(entry["endpoint"], entry["params"], entry["body"],
+                        entry.get("etag"), entry.get("last_modified"))
+
+    def entries(self):
+        if not os.path.isdir(self.cache_dir):
+            return
+        for filename in sorted(os.listdir(self.cache_dir)):
+            if filename.endswith(".json") and not filename.startswith("."):
+                try:
+                    with open(os.path.join(self.cache_dir, filename), "r", encoding="utf-8") as f:
+                        yield json.load(f)
+                except (OSError, ValueError):
+                    continue
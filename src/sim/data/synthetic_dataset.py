@@ -0,0 +1,156 @@
+import os
+from datetime import date as date_type
+
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+
+try:
+    from .api_manager import get_date_range
+    from .consumption_generator import ConsumptionGenerator
+    from .datafile_io import write_date_folder
+    from .dataset_store import DatasetStore
+except ImportError:
+    from api_manager import get_date_range
+    from consumption_generator import ConsumptionGenerator
+    from datafile_io import write_date_folder
+    from dataset_store import DatasetStore
+
+'''
+Offline stand-in for the REN data: market prices, solar, wind and consumption
+of any date, deterministic from (seed, date), in the same shape as the API
+generated folders (hourly prices, 15 minute production and consumption).
+    - solar: clear-sky curve of the day length and sun height at the latitude,
+      times a daily clearness draw
+    - wind: seasonal level times a daily draw, with a smooth intra-day walk
+    - price: seasonal level, morning and evening peaks, a midday dip on sunny days
+    - consumption: the default household of consumption_generator
+'''
+load_dotenv()
+
+SYNTHETIC_SEED = int(os.getenv("SYNTHETIC_SEED", "0"))
+
+# Lisbon, the REN data is Portuguese
+SYNTHETIC_LATITUDE = 38.7
+
+
+class SyntheticDatasetGenerator:
+
+    def __init__(self, seed=SYNTHETIC_SEED, latitude=SYNTHETIC_LATITUDE, solar_peak=4.5, wind_mean=1.5,
+                 wind_max=3.0, price_level=0.09, samples_per_hour=4):
+        self.seed = seed
+        self.latitude = np.radians(latitude)
+        self.solar_peak = solar_peak
+        self.wind_mean = wind_mean
+        self.wind_max = wind_max
+        self.price_level = price_level
+        self.samples_per_hour = samples_per_hour
+
+        self.consumption_generator = ConsumptionGenerator(seed=seed, samples_per_hour=samples_per_hour)
+
+        self.sample_hours = np.arange(24 * samples_per_hour) / samples_per_hour
+        self.sample_times = [f"{int(hour):02d}:{int(round(hour % 1 * 60)):02d}" for hour in self.sample_hours]
+        self.price_times = [f"{hour:02d}:00" for hour in range(24)]
+
+    def get_rng(self, date: str):
+        return np.random.default_rng(np.random.SeedSequence([self.seed, date_type.fromisoformat(date).toordinal()]))
+
+    @staticmethod
+    def get_season(date: str):
+        """cos of the day of the year, 1 in mid January and -1 in mid July"""
+        day_of_year = date_type.fromisoformat(date).timetuple().tm_yday
+        return np.cos(2 * np.pi * (day_of_year - 15) / 365), day_of_year
+
+    def get_sun_height(self, day_of_year):
+        """sin of the sun elevation at every sample (solar time), negative at night"""
+        declination = np.radians(23.44) * np.sin(2 * np.pi * (284 + day_of_year) / 365)
+        hour_angle = np.radians(15 * (self.sample_hours - 12))
+
+        return (np.sin(self.latitude) * np.sin(declination)
+                + np.cos(self.latitude) * np.cos(declination) * np.cos(hour_angle))
+
+    def generate_solar(self, rng, day_of_year):
+        # Peak of the year is the solstice noon sun
+        max_height = np.sin(np.pi / 2 - self.latitude + np.radians(23.44))
+        clear_sky = np.maximum(self.get_sun_height(day_of_year), 0.0) / max_height
+
+        clearness = 0.3 + 0.7 * rng.beta(4.0, 1.5)
+        # Passing clouds matter more on cloudy days
+        passing = np.exp(rng.normal(0.0, 0.15 * (1.0 - clearness) + 0.02, clear_sky.shape))
+
+        return np.clip(self.solar_peak * clear_sky ** 1.2 * clearness * passing, 0.0, self.solar_peak)
+
+    def generate_wind(self, rng, season):
+        level = self.wind_mean * (1.0 + 0.3 * season) * rng.gamma(4.0, 0.25)
+
+        walk = np.cumsum(rng.normal(0.0, 0.08, self.sample_hours.shape))
+        walk = np.convolve(walk - walk.mean(), np.ones(5) / 5, mode="same")
+        afternoon = 0.15 * np.sin(np.pi * np.clip(self.sample_hours - 10, 0, 12) / 12)
+
+        return np.clip(level * (1.0 + walk + afternoon), 0.0, self.wind_max)
+
+    def generate_prices(self, rng, season, solar):
+        hours = np.arange(24)
+        daily_solar = solar.mean() / (self.solar_peak / 3)
+
+        shape = (1.0
+                 + 0.35 * np.exp(-((hours - 8.5) / 1.5) ** 2)
+                 + 0.55 * np.exp(-((hours - 20.5) / 2.0) ** 2)
+                 - 0.25 * (hours < 6)
+                 - 0.5 * min(daily_solar, 1.0) * np.exp(-((hours - 13.5) / 2.5) ** 2))
+
+        level = self.price_level * (1.0 + 0.25 * season) * rng.lognormal(0.0, 0.2)
+        noise = rng.lognormal(0.0, 0.08, 24)
+
+        return np.clip(level * shape * noise, 0.005, 0.25)
+
+    def generate_date(self, date: str):
+        """(price, solar, wind, consumption) DataFrames of one date, as the API manager writes them"""
+        rng = self.get_rng(date)
+        season, day_of_year = self.get_season(date)
+
+        solar = self.generate_solar(rng, day_of_year)
+        wind = self.generate_wind(rng, season)
+        prices = self.generate_prices(rng, season, solar)
+
+        df_price = pd.DataFrame({'Time (Hour)': self.price_times, 'Price (€/kWh)': prices})
+        df_solar = pd.DataFrame({'Time (Hour)': self.sample_times, 'Production (kW)': solar})
+        df_wind = pd.DataFrame({'Time (Hour)': self.sample_times, 'Production (kW)': wind})
+        df_consumption = self.consumption_generator.generate_dataframe(date)
+
+        return df_price, df_solar, df_wind, df_consumption
+
+    def write_date(self, date: str, datafiles_dir, store=None):
+        """Write one date as a CSV folder, or only into store (a DatasetStore) when given"""
+        dataframes = self.generate_date(date)
+
+        if store is not None:
+            store.append(date, dataframes)
+            return date
+
+        write_date_folder(datafiles_dir, date, dataframes)
+        return date
+
+    def write_range(self, start_date: str, end_date: str, datafiles_dir, binary=False, overwrite=False):
+        """Write every date of the range, as CSV folders or into the consolidated store of datafiles_dir"""
+        store = DatasetStore(os.path.join(datafiles_dir, "store")) if binary else None
+
+        written = []
+        for date in get_date_range(start_date, end_date):
+            exists = store.has_date(date) if binary else os.path.isdir(os.path.join(datafiles_dir, date))
+            if overwrite or not exists:
+                written.append(self.write_date(date, datafiles_dir, store))
+
+        return written
+
+
+synthetic_generator = SyntheticDatasetGenerator()
+
+
+if __name__ == "__main__":
+    year = int(os.getenv("SYNTHETIC_YEAR", "2025"))
+    datafiles_dir = os.getenv("SYNTHETIC_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "datafiles"))
+
+    written = synthetic_generator.write_range(f"{year}-01-01", f"{year}-12-31", datafiles_dir,
+                                              binary=os.getenv("SYNTHETIC_FORMAT", "csv") == "binary")
+    print(f"Wrote {len(written)} synthetic date(s) to {datafiles_dir}")
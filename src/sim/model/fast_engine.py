@@ -0,0 +1,173 @@
+import os
+import time
+from dotenv import load_dotenv
+
+from sim.agent.agent_factory import create_decision_agent, apply_simulation_configs
+from sim.agent.actions import validate_flows
+from sim.data.data_manager import DataManager
+from sim.model.recorder import StepRecorder
+from log.log_controller import log_controller
+
+load_dotenv()
+
+# "mesa" runs HEMSModel step by step, "fast" runs FastEngine
+ENGINE = os.getenv("ENGINE", "mesa")
+
+
+def get_config_intervals(interval, log_type="simulation"):
+    """(hour_interval, minute_interval) of the interval in minutes set in the simulation configs"""
+    if interval is None or interval == 0:
+        # Default to 1 hour intervals if None or 0 is provided
+        log_controller.add_log("Interval is None or 0, defaulting to 1 hour intervals", log_type)
+        return 1, 0
+    elif interval == 60:
+        log_controller.add_log("The interval is 60 minutes, defaulting to 1 hour intervals", log_type)
+        return 1, 0
+    else:
+        log_controller.add_log(f"The interval is {interval} minutes", log_type)
+        return 0, interval
+
+
+def update_time(current_time, hour_interval, minute_interval):
+    hour, minute = current_time
+
+    minute += minute_interval
+    hour += hour_interval
+
+    if minute >= 60:
+        minute -= 60
+        hour += 1
+    if hour >= 24:
+        hour -= 24
+
+    return (hour, minute)
+
+
+class FastEngine:
+    """Headless HEMSModel: a whole day in one loop, without Mesa.
+
+    The inputs of every step come from one DataManager batch query and the
+    results go to the same StepRecorder HEMSModel uses, the decisions are the
+    ones the HEMSAgent path takes for the same configuration.
+    """
+    log_type = "simulation"
+
+    def __init__(self, agent_type="smart", data_manager=None):
+        self.agent_type = agent_type
+        self.data_manager = data_manager if data_manager is not None else DataManager()
+
+        self.battery_capacity = int(os.getenv("MAX_CAPACITY"))
+        self.interval_str = os.getenv("INTERVAL", "1,0")
+        self.hour_interval, self.minute_interval = map(int, self.interval_str.split(","))
+
+        self.steps = self.get_steps()
+        self.decision_agent = create_decision_agent(agent_type, self.data_manager)
+        self.datacollector = StepRecorder(self.steps)
+
+    def setup_configs(self, simulation_configs):
+        self.simulation_configs = simulation_configs
+
+        self.battery_capacity = simulation_configs.battery_max_capacity
+        self.hour_interval, self.minute_interval = get_config_intervals(simulation_configs.interval, self.log_type)
+        self.steps = self.get_steps()
+
+        self.decision_agent = create_decision_agent(self.agent_type, self.data_manager)
+        apply_simulation_configs(simulation_configs, self.data_manager, self.decision_agent, self.log_type)
+
+    def get_steps(self):
+        return 24 * 60 // (self.hour_interval * 60 + self.minute_interval)
+
+    def get_step_times(self):
+        """cur_hour of every step, as HEMSModel.update_time advances it"""
+        times = []
+        cur_hour = (0, 0)
+        for _ in range(self.steps):
+            cur_hour = update_time(cur_hour, self.hour_interval, self.minute_interval)
+            times.append(cur_hour)
+        return times
+
+    def run(self):
+        """Simulate the whole day, return the results DataFrame"""
+        if self.decision_agent is None:
+            raise ValueError(f"Unknown agent type: {self.agent_type}")
+
+        times = self.get_step_times()
+        boundaries = [0] + [hour * 60 + minute for hour, minute in times]
+        inputs = self.data_manager.get_model_data_batch(boundaries)
+
+        self.datacollector = StepRecorder(self.steps)
+
+        balance, capacity = 0.0, 0.0
+        for step, cur_hour in enumerate(times):
+            step_inputs = inputs[step].tolist()
+            actions, new_balance, new_capacity = self.decision_agent.decide(balance, capacity, cur_hour, step_inputs)
+
+            # Deterministic decisions, asking again as HEMSAgent does gives the same actions
+            if not validate_flows(actions, step_inputs, capacity, cur_hour, self.battery_capacity):
+                raise RuntimeError(f"Invalid actions at {cur_hour[0]:02}:{cur_hour[1]:02}: {actions}")
+
+            price, solar_production, wind_production, consumption = step_inputs
+            self.datacollector.record(cur_hour[0] * 60 + cur_hour[1], solar_production, wind_production,
+                                      consumption, capacity, price, actions, new_balance, new_capacity)
+
+            balance, capacity = new_balance, new_capacity
+
+        # Leave the cursor where the step by step path leaves it
+        if times:
+            self.data_manager.update_time_stamp(times[-1])
+
+        return self.datacollector.get_model_vars_dataframe()
+
+    def get_model_vars_dataframe(self):
+        return self.datacollector.get_model_vars_dataframe()
+
+
+def create_model(agent_type="smart", engine=None, data_manager=None):
+    """HEMSModel or FastEngine for the engine name, ENGINE by default"""
+    engine = engine or ENGINE
+    if engine == "fast":
+        return FastEngine(agent_type=agent_type, data_manager=data_manager)
+    if engine == "mesa":
+        from sim.model.model import HEMSModel
+        return HEMSModel(agent_type=agent_type, data_manager=data_manager)
+    raise ValueError(f"Unknown engine: {engine}")
+
+
+def run_model(model):
+    """Simulate a whole day on either engine, return the results DataFrame"""
+    if isinstance(model, FastEngine):
+        return model.run()
+
+    for _ in range(model.steps):
+        model.step()
+    return model.datacollector.get_model_vars_dataframe()
+
+
+def check_parity(agent_type="basic", date=None, simulation_configs=None):
+    """Run HEMSModel and FastEngine on the same data, return (equal, mesa_results, fast_results, timings)"""
+    from sim.model.model import HEMSModel
+
+    data_date = date or os.getenv("DATE", "2025-01-01")
+    model = HEMSModel(agent_type=agent_type, data_manager=DataManager(date=data_date))
+    engine = FastEngine(agent_type=agent_type, data_manager=DataManager(date=data_date))
+    if simulation_configs is not None:
+        model.setup_configs(simulation_configs)
+        engine.setup_configs(simulation_configs)
+
+    start = time.perf_counter()
+    for _ in range(model.steps):
+        model.step()
+    mesa_results = model.datacollector.get_model_vars_dataframe()
+    mesa_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    fast_results = engine.run()
+    fast_seconds = time.perf_counter() - start
+
+    equal = mesa_results.astype(object).equals(fast_results.astype(object))
+    return equal, mesa_results, fast_results, {"mesa": mesa_seconds, "fast": fast_seconds}
+
+
+if __name__ == "__main__":
+    equal, _, _, timings = check_parity(agent_type=os.getenv("PARITY_AGENT", "basic"))
+    print(f"Parity: {equal}, Mesa {timings['mesa']:.4f}s, fast {timings['fast']:.4f}s")
@@ -1,8 +1,12 @@
 import os
 from dotenv import load_dotenv
 from mesa import Model
-from mesa.datacollection import DataCollector
 from sim.agent.agent_base import HEMSAgent
+from sim.agent.actions import new_flows, format_actions
+from sim.model.fast_engine import get_config_intervals, update_time
+from sim.model.recorder import StepRecorder
+from sim.model.step_context import StepContext
+from sim.data.data_manager import DataManager
 from log.log_controller import log_controller
 
 load_dotenv()
@@ -10,10 +14,13 @@ load_dotenv()
 class HEMSModel(Model):
     log_type = "simulation"
 
-    def __init__(self, agent_type="smart"):
+    def __init__(self, agent_type="smart", data_manager=None):
         super().__init__()
         self.agent_type = agent_type
 
+        # Data context of this run, its time cursor is moved by this model only
+        self.data_manager = data_manager if data_manager is not None else DataManager()
+
         # Initialize model parameters
         self.battery_capacity = int(os.getenv("MAX_CAPACITY"))
         self.interval_str = os.getenv("INTERVAL", "1,0")
@@ -21,7 +28,7 @@ class HEMSModel(Model):
 
         self.steps = self.get_steps()
         self.cur_capacity = 0.0
-        self.actions = []
+        self.actions = new_flows()
         self.price = 0.0
         self.solar_production = 0.0
         self.wind_production = 0.0
@@ -36,42 +43,19 @@ class HEMSModel(Model):
         agent = HEMSAgent(self, agent_type)
         self.agents.add(agent)
 
-        # Data collector setup
-        self.datacollector = DataCollector(
-            model_reporters={
-                "Current_Hour": lambda m: f"{m.cur_hour[0]:02}:{m.cur_hour[1]:02}",
-                "Solar_Production": lambda m: m.solar_production,
-                "Wind_Production": lambda m: m.wind_production,
-                "Consumption": lambda m: m.consumption,
-                "Current_Capacity": lambda m: m.old_capacity,
-                "Price": lambda m: m.price,
-                "Actions": lambda m: m.format_actions(m.actions),
-                "Balance": lambda m: m.balance,
-                "New_Capacity": lambda m: m.cur_capacity
-            }
-        )
+        # Columnar recorder of every step (replaces the Mesa DataCollector)
+        self.datacollector = StepRecorder(self.steps)
 
     def setup_configs(self, simulation_configs):
         self.simulation_configs = simulation_configs
 
         self.battery_capacity = simulation_configs.battery_max_capacity
         
-        if simulation_configs.interval is None or simulation_configs.interval == 0:
-            # Default to 1 hour intervals if None or 0 is provided
-            log_controller.add_log("Interval is None or 0, defaulting to 1 hour intervals", self.log_type)
-            self.hour_interval = 1
-            self.minute_interval = 0
-        elif simulation_configs.interval == 60:
-            log_controller.add_log("The interval is 60 minutes, defaulting to 1 hour intervals", self.log_type)
-            self.hour_interval = 1
-            self.minute_interval = 0
-        else:
-            log_controller.add_log(f"The interval is {simulation_configs.interval} minutes", self.log_type)
-            self.hour_interval = 0
-            self.minute_interval = simulation_configs.interval
+        self.hour_interval, self.minute_interval = get_config_intervals(simulation_configs.interval, self.log_type)
         
         # Recalculate steps with new intervals
         self.steps = self.get_steps()
+        self.datacollector = StepRecorder(self.steps)
 
         for agent in list(self.agents):
             agent.remove()
@@ -82,6 +66,10 @@ class HEMSModel(Model):
 
     def step(self):
         self.cur_hour = self.update_time(self.cur_hour)
+
+        # Inputs of the step are fetched once, the agent decides and validates on them
+        self.step_context = StepContext(self.cur_hour, self.balance, self.cur_capacity, self.battery_capacity,
+                                        self.data_manager.get_model_data_entry(self.cur_hour))
         self.agents.do("step")
         self.datacollector.collect(self)
 
@@ -89,27 +77,8 @@ class HEMSModel(Model):
         return 24 * 60 // (self.hour_interval * 60 + self.minute_interval)
 
     def update_time(self, current_time):
-        hour, minute = current_time
-
-        minute += self.minute_interval
-        hour += self.hour_interval
-
-        if minute >= 60:
-            minute -= 60
-            hour += 1
-        if hour >= 24:
-            hour -= 24
-
-        return (hour, minute)
+        return update_time(current_time, self.hour_interval, self.minute_interval)
 
     def format_actions(self, actions):
-        """Format actions list into a string: 'key: value, key: value, ...'"""
-        if not actions:
-            return "No actions"
-        
-        action_strings = []
-        for action_dict in actions:
-            for key, value in action_dict.items():
-                action_strings.append(f"{key}: {value:.4f}")
-        
-        return ", ".join(action_strings)
+        """Format the flow vector into a string: 'key: value, key: value, ...'"""
+        return format_actions(actions)
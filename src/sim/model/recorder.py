@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+
+from sim.agent.actions import FLOW_KEYS
+
+# Float metrics of every step, in the DataCollector column order
+FLOAT_COLUMNS = ("Solar_Production", "Wind_Production", "Consumption", "Current_Capacity",
+                 "Price", "Balance", "New_Capacity")
+
+# Column order of the results frame, one column per flow where the DataCollector had its Actions string
+RESULT_COLUMNS = ("Current_Hour", "Solar_Production", "Wind_Production", "Consumption",
+                  "Current_Capacity", "Price", *FLOW_KEYS, "Balance", "New_Capacity")
+
+
+class StepRecorder:
+    """Columnar replacement of the Mesa DataCollector of HEMSModel.
+
+    Every step writes into preallocated arrays (one float64 array per metric,
+    the step time as integer minutes since midnight and the flow vector as a
+    row of a (steps, 7) array), nothing is formatted until a DataFrame or dict
+    is asked for.
+    """
+
+    def __init__(self, steps):
+        self.size = 0
+        self.allocate(max(int(steps), 1))
+
+    def allocate(self, capacity):
+        minutes = np.zeros(capacity, dtype=np.int64)
+        values = np.zeros((capacity, len(FLOAT_COLUMNS)), dtype=np.float64)
+        flows = np.zeros((capacity, len(FLOW_KEYS)), dtype=np.float64)
+
+        if self.size:
+            minutes[:self.size] = self.minutes[:self.size]
+            values[:self.size] = self.values[:self.size]
+            flows[:self.size] = self.flows[:self.size]
+
+        self.minutes, self.values, self.flows = minutes, values, flows
+
+    def __len__(self):
+        return self.size
+
+    def record(self, minutes, solar_production, wind_production, consumption, current_capacity,
+               price, flows, balance, new_capacity):
+        if self.size == len(self.minutes):
+            # More steps than planned, e.g. a model stepped past one day
+            self.allocate(2 * len(self.minutes))
+
+        row = self.size
+        self.minutes[row] = minutes
+        self.values[row] = (solar_production, wind_production, consumption, current_capacity,
+                            price, balance, new_capacity)
+        self.flows[row] = flows
+        self.size += 1
+
+    def collect(self, model):
+        """Record the state of a HEMSModel after its step, as its DataCollector did"""
+        hour, minute = model.cur_hour
+        self.record(hour * 60 + minute, model.solar_production, model.wind_production, model.consumption,
+                    model.old_capacity, model.price, model.actions, model.balance, model.cur_capacity)
+
+    def get_column(self, name):
+        return self.values[:self.size, FLOAT_COLUMNS.index(name)]
+
+    def get_flows(self):
+        """(steps, 7) flows, columns in FLOW_KEYS order"""
+        return self.flows[:self.size]
+
+    def get_minutes(self):
+        return self.minutes[:self.size]
+
+    def get_hour_labels(self):
+        return [f"{minutes // 60:02}:{minutes % 60:02}" for minutes in self.get_minutes().tolist()]
+
+    def to_dict(self):
+        """Column name -> array, Current_Hour as minutes"""
+        result = {"Current_Hour": self.get_minutes()}
+        for name in FLOAT_COLUMNS:
+            result[name] = self.get_column(name)
+        flows = self.get_flows()
+        for index, name in enumerate(FLOW_KEYS):
+            result[name] = flows[:, index]
+        return result
+
+    def get_model_vars_dataframe(self):
+        """Results frame: 'HH:MM' hours, the float metrics and one column per flow"""
+        columns = self.to_dict()
+        columns["Current_Hour"] = self.get_hour_labels()
+
+        return pd.DataFrame(columns, columns=list(RESULT_COLUMNS))
@@ -0,0 +1,16 @@
+class StepContext:
+    """State and inputs of one HEMSModel step, resolved once by the model.
+
+    The decision and its validation both read the inputs from here, so a step
+    queries the DataManager once however many attempts the agent needs.
+    """
+
+    def __init__(self, cur_hour, balance, cur_capacity, battery_max_capacity, inputs):
+        self.cur_hour = cur_hour
+        self.balance = balance
+        self.cur_capacity = cur_capacity
+        self.battery_max_capacity = battery_max_capacity
+
+        # (price, solar, wind, consumption) of the step window
+        self.inputs = tuple(inputs)
+        self.price, self.solar_production, self.wind_production, self.consumption = self.inputs
@@ -1,40 +1,51 @@
-from sim.data.json_result_manager import json_result_manager
+from sim.data.json_result_manager import JsonResultManager
 from ast import Dict
-from sim.model.model import HEMSModel
+from sim.model.fast_engine import ENGINE, create_model, run_model
 from log.log_controller import log_controller
 
 class SimulationManager:
     log_type = "simulation"
 
-    def __init__(self):
-        self.model_smart = HEMSModel(agent_type="smart")
-        self.model_basic = HEMSModel(agent_type="basic")
+    def __init__(self, engine=None):
+        self.engine = engine or ENGINE
+        self.model_smart = create_model(agent_type="smart", engine=self.engine)
+        self.model_basic = create_model(agent_type="basic", engine=self.engine)
+        self.model_oracle = create_model(agent_type="oracle", engine=self.engine)
         
     def start_simulation(self, config, df_solar_production=None, df_wind_production=None, df_consumption=None, df_price=None) -> Dict:
         log_controller.add_log(f"Starting simulation for {config}", self.log_type)
         
         self.pass_configs_to_model(config, df_solar_production, df_wind_production, df_consumption, df_price)
-        
-        for i in range(self.model_smart.steps):
-            self.model_smart.step()
 
-        results = self.model_smart.datacollector.get_model_vars_dataframe()
+        # Results of this run only, priced with the data the smart model was configured with
+        json_result_manager = JsonResultManager(data_manager=self.model_smart.data_manager)
+        
+        results = run_model(self.model_smart)
         json_result_manager.save_to_json_file(results, agent_type="smart")
 
-        for i in range(self.model_basic.steps):
-            self.model_basic.step()
-
-        results = self.model_basic.datacollector.get_model_vars_dataframe()
+        results = run_model(self.model_basic)
         json_result_manager.save_to_json_file(results, agent_type="basic")
 
+        # Perfect foresight upper bound of the day
+        results = run_model(self.model_oracle)
+        json_result_manager.save_to_json_file(results, agent_type="oracle")
+
         json_result_manager.calculate_final_results()
 
         return json_result_manager.final_json_data
 
     def pass_configs_to_model(self, config, df_solar_production=None, df_wind_production=None, df_consumption=None, df_price=None):
         self.simulation_configs = SimulationConfigs(config, df_solar_production, df_wind_production, df_consumption, df_price)
+
+        if self.simulation_configs.engine != self.engine:
+            self.engine = self.simulation_configs.engine
+            self.model_smart = create_model(agent_type="smart", engine=self.engine)
+            self.model_basic = create_model(agent_type="basic", engine=self.engine)
+            self.model_oracle = create_model(agent_type="oracle", engine=self.engine)
+
         self.model_smart.setup_configs(self.simulation_configs)
         self.model_basic.setup_configs(self.simulation_configs)
+        self.model_oracle.setup_configs(self.simulation_configs)
 
 
 simulation_manager = SimulationManager()
@@ -50,6 +61,9 @@ class SimulationConfigs:
         self.tariff = config.get("tariff", None)
         self.complex_mode = False
 
+        # "mesa" (step by step HEMSModel) or "fast" (FastEngine)
+        self.engine = config.get("engine", None) or ENGINE
+
         self.df_solar_production = df_solar_production
         self.df_wind_production = df_wind_production
         self.df_consumption = df_consumption
@@ -0,0 +1,28 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+# DataManagers write missing dates offline instead of calling the API
+os.environ.setdefault("SYNTHESIZE_MISSING_DATES", "true")
+os.environ.setdefault("LOG_ACTIVE", "false")
+
+
+@pytest.fixture
+def smart_model_path(tmp_path, monkeypatch):
+    """Small random NumPy actor as the smart policy, SMART_MODEL_PATH names the .zip it stands in for"""
+    rng = np.random.default_rng(0)
+    np.savez(tmp_path / "policy.npz", activations=np.array(["ReLU", "ReLU"]),
+             layer_0_weight=rng.normal(0, 0.5, (16, 10)), layer_0_bias=rng.normal(0, 0.1, 16),
+             layer_1_weight=rng.normal(0, 0.5, (16, 16)), layer_1_bias=rng.normal(0, 0.1, 16),
+             mu_weight=rng.normal(0, 0.5, (7, 16)), mu_bias=np.zeros(7),
+             action_low=np.zeros(7, dtype=np.float32), action_high=np.ones(7, dtype=np.float32))
+
+    model_path = str(tmp_path / "policy.zip")
+    monkeypatch.setenv("SMART_MODEL_PATH", model_path)
+    return model_path
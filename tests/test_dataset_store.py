@@ -0,0 +1,38 @@
+import os
+
+from sim.data.dataset_store import DatasetStore
+from sim.data.datafile_io import write_date_folder
+from sim.data.synthetic_dataset import synthetic_generator
+
+DATE = "2025-06-21"
+
+
+def test_overwriting_unchanged_dates_does_not_grow_the_store(tmp_path):
+    store = DatasetStore(str(tmp_path / "store"))
+    dataframes = synthetic_generator.generate_date(DATE)
+
+    store.append(DATE, dataframes)
+    size = os.path.getsize(store.get_data_path("2025"))
+
+    for _ in range(5):
+        folder_path = write_date_folder(str(tmp_path), DATE, dataframes)
+        store.append(DATE, dataframes)
+
+        assert os.path.getsize(store.get_data_path("2025")) == size
+        # The rewritten folder is no newer than the store entry, the store still serves the date
+        assert store.is_current(DATE, folder_path)
+
+
+def test_changed_dates_are_appended(tmp_path):
+    store = DatasetStore(str(tmp_path / "store"))
+    df_price, df_solar, df_wind, df_consumption = synthetic_generator.generate_date(DATE)
+
+    store.append(DATE, (df_price, df_solar, df_wind, df_consumption))
+    size = os.path.getsize(store.get_data_path("2025"))
+
+    df_price = df_price.copy()
+    df_price.iloc[:, 1] += 0.01
+    store.append(DATE, (df_price, df_solar, df_wind, df_consumption))
+
+    assert os.path.getsize(store.get_data_path("2025")) > size
+    assert (store.read_date(DATE)[0].iloc[:, 1].to_numpy() == df_price.iloc[:, 1].to_numpy()).all()
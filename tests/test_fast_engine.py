@@ -0,0 +1,41 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from sim.agent.actions import FLOW_KEYS
+from sim.data.synthetic_dataset import synthetic_generator
+from sim.model.fast_engine import check_parity
+
+DATE = "2025-06-21"
+
+
+def get_simulation_configs(interval, battery_max_capacity=10, tariff=0.75):
+    """Uploaded-data configs: both engines run on the same injected synthetic day, no network"""
+    df_price, df_solar, df_wind, df_consumption = synthetic_generator.generate_date(DATE)
+
+    return SimpleNamespace(selected_date=None, complex_mode=False, interval=interval,
+                           battery_max_capacity=battery_max_capacity, tariff=tariff,
+                           df_price=df_price, df_solar_production=df_solar,
+                           df_wind_production=df_wind, df_consumption=df_consumption)
+
+
+@pytest.mark.parametrize("agent_type", ["basic", "oracle", "mpc", "smart"])
+@pytest.mark.parametrize("interval", [15, 60])
+def test_fast_engine_matches_mesa(agent_type, interval, smart_model_path):
+    # The smart agent of both engines loads a small random actor standing in for the trained policy
+    equal, mesa_results, fast_results, _ = check_parity(agent_type, simulation_configs=get_simulation_configs(interval))
+
+    assert len(mesa_results) == len(fast_results) == 24 * 60 // interval
+    np.testing.assert_array_equal(fast_results[list(FLOW_KEYS)].to_numpy(), mesa_results[list(FLOW_KEYS)].to_numpy())
+    np.testing.assert_array_equal(fast_results["New_Capacity"].to_numpy(), mesa_results["New_Capacity"].to_numpy())
+    assert fast_results["Balance"].iloc[-1] == mesa_results["Balance"].iloc[-1]
+    assert equal
+
+
+def test_fast_engine_follows_configured_battery():
+    _, _, small, _ = check_parity("basic", simulation_configs=get_simulation_configs(15, battery_max_capacity=2))
+    _, _, large, _ = check_parity("basic", simulation_configs=get_simulation_configs(15, battery_max_capacity=20))
+
+    assert small["New_Capacity"].max() <= 2
+    assert large["New_Capacity"].max() > 2
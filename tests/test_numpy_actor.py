@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")
+stable_baselines3 = pytest.importorskip("stable_baselines3")
+gym = pytest.importorskip("gymnasium")
+
+from sim.agent.smart.numpy_actor import NumpyActor, export_actor, check_actor_parity
+
+
+class SpacesEnv(gym.Env):
+    """Observation and action spaces of the training environment, enough to build a SAC policy"""
+
+    observation_space = gym.spaces.Box(low=np.array([0, 0, 0, 0, -1, -1, 0, 0, 0, 0], dtype=np.float32),
+                                       high=np.ones(10, dtype=np.float32), dtype=np.float32)
+    action_space = gym.spaces.Box(low=0.0, high=1.0, shape=(7,), dtype=np.float32)
+
+    def reset(self, seed=None, options=None):
+        super().reset(seed=seed)
+        return self.observation_space.sample(), {}
+
+    def step(self, action):
+        return self.observation_space.sample(), 0.0, False, False, {}
+
+
+def test_numpy_actor_matches_sac(tmp_path):
+    model = stable_baselines3.SAC("MlpPolicy", SpacesEnv(), policy_kwargs={"net_arch": [256, 256, 128]},
+                                  seed=0, device="cpu")
+    # Move the weights away from their initialization so every layer shapes the actions
+    with torch.no_grad():
+        for parameter in model.policy.actor.parameters():
+            parameter.add_(torch.randn_like(parameter) * 0.1)
+
+    model_path = str(tmp_path / "best_model.zip")
+    model.save(model_path)
+    npz_path = export_actor(model_path)
+
+    assert check_actor_parity(model_path, npz_path, samples=2000) < 1e-5
+
+    actor = NumpyActor(npz_path)
+    observation = SpacesEnv.observation_space.sample()
+    expected, _ = model.predict(observation, deterministic=True)
+    actual, _ = actor.predict(observation, deterministic=True)
+
+    assert actual.shape == expected.shape
+    np.testing.assert_allclose(actual, expected, atol=1e-5)
@@ -0,0 +1,92 @@
+import json
+import os
+import time
+
+import pandas as pd
+import pytest
+
+from sim.data.api_manager import APIManager, RateLimiter
+from sim.data.dataset_store import DatasetStore
+from sim.data.ren_stub_server import RENStubServer
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                            "src", "sim", "data", "fixtures", "ren")
+DATES = ["2025-06-01", "2025-06-02"]
+
+
+@pytest.fixture
+def server():
+    with RENStubServer(fixtures_dir=FIXTURES_DIR) as server:
+        yield server
+
+
+def get_api_manager(server, datafiles_dir, **kwargs):
+    """APIManager against the stub, writing into its own datafiles folder and store"""
+    kwargs = {"concurrency": 2, "rate_limit": 0, "backoff": 0.001, **kwargs}
+    return APIManager(base_url=server.url, datafiles_dir=str(datafiles_dir),
+                      store=DatasetStore(os.path.join(datafiles_dir, "store")), **kwargs)
+
+
+def test_prefetch_replays_fixtures(server, tmp_path):
+    api_manager = get_api_manager(server, tmp_path)
+
+    result = api_manager.prefetch_range("2025-06-01", "2025-06-03")
+
+    assert result["done"] == DATES
+    # No fixture for the last date, the stub answers 404 and the date fails without retries
+    assert list(result["failed"]) == ["2025-06-03"]
+    assert server.stats["served"] == 4 and server.stats["missing"] == 1
+
+    with open(os.path.join(FIXTURES_DIR, "ElectricityMarketPricesDaily", "2025-06-01.json"), encoding="utf-8") as f:
+        prices = json.load(f)["series"][0]["data"]
+    df_price = pd.read_csv(os.path.join(tmp_path, "2025-06-01", "market_prices.csv"))
+    # Hour 24 of the response is midnight, prices go from €/MWh to €/kWh
+    assert df_price.iloc[0, 1] == pytest.approx(prices[23] / 1000)
+    assert api_manager.store.get_dates() == DATES
+
+    assert api_manager.prefetch_range(*DATES)["skipped"] == DATES
+
+
+def test_prefetch_retries_injected_failures(tmp_path):
+    with RENStubServer(fixtures_dir=FIXTURES_DIR, failure_rate=0.5, seed=0) as server:
+        result = get_api_manager(server, tmp_path, retries=20).prefetch_range(*DATES)
+
+    assert result["done"] == DATES and not result["failed"]
+    assert server.stats["injected_failures"] > 0
+    assert server.stats["requests"] == server.stats["served"] + server.stats["injected_failures"]
+
+
+def test_prefetch_gives_up_after_the_retries(tmp_path):
+    with RENStubServer(fixtures_dir=FIXTURES_DIR, failure_rate=1.0) as server:
+        result = get_api_manager(server, tmp_path, retries=2).prefetch_range(DATES[0], DATES[0])
+
+    assert "HTTP 503" in result["failed"][DATES[0]]
+    assert server.stats["requests"] == 3
+
+
+def test_stale_responses_are_revalidated_with_etags(server, tmp_path):
+    # Every cached response is stale at once, so each download asks the stub with If-None-Match
+    api_manager = get_api_manager(server, tmp_path, cache_ttl=0)
+    api_manager.prefetch_range(*DATES)
+    store_size = os.path.getsize(api_manager.store.get_data_path("2025"))
+
+    result = api_manager.prefetch_range(*DATES, overwrite=True)
+
+    assert result["done"] == DATES
+    assert server.stats["served"] == 4 and server.stats["not_modified"] == 4
+    # Same responses, the store does not grow
+    assert os.path.getsize(api_manager.store.get_data_path("2025")) == store_size
+
+
+def test_rate_limiter_spaces_requests(server, tmp_path):
+    limiter = RateLimiter(20)
+    start = time.monotonic()
+    for _ in range(5):
+        limiter.wait()
+    assert time.monotonic() - start >= 4 / 20 * 0.9
+
+    # Four requests from two threads, at most 20 per second
+    api_manager = get_api_manager(server, tmp_path, rate_limit=20)
+    start = time.monotonic()
+    assert api_manager.prefetch_range(*DATES)["done"] == DATES
+    assert time.monotonic() - start >= 3 / 20 * 0.9
@@ -0,0 +1,18 @@
+import numpy as np
+
+from sim.agent.agent_factory import create_decision_agent
+from sim.agent.actions import FLOW_KEYS
+from sim.agent.smart.numpy_actor import NumpyActor
+from sim.data.data_manager import DataManager
+
+
+def test_factory_builds_the_smart_agent_from_an_exported_actor(smart_model_path):
+    # Only policy.npz exists, the missing policy.zip of SMART_MODEL_PATH falls back to it
+    agent = create_decision_agent("smart", DataManager())
+
+    assert isinstance(agent.model, NumpyActor)
+
+    actions, balance, cur_capacity = agent.smart_decision(0.0, 0.0, (12, 0))
+    assert len(actions) == len(FLOW_KEYS)
+    assert 0.0 <= cur_capacity <= agent.battery_max_capacity
+    assert np.isfinite(balance)